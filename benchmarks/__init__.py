@@ -0,0 +1 @@
+"""Benchmarks for the LED-Pi integration."""
@@ -0,0 +1,192 @@
+"""Run the benchmarks against a local stand-in controller.
+
+Results are compared with the stored baseline and the run fails if a metric
+regressed by more than the tolerance. Baselines depend on the machine, so
+update them with --update before comparing changes on a new machine.
+"""
+import argparse
+import asyncio
+import json
+import pathlib
+import statistics
+import sys
+import time
+import tracemalloc
+from homeassistant.components.light import ATTR_BRIGHTNESS, ATTR_RGB_COLOR
+from types import SimpleNamespace
+
+from custom_components.ledpi.api import API
+from custom_components.ledpi.const import ATTR_STATE
+from custom_components.ledpi.light import LedPi
+from custom_components.ledpi.sensor import (
+    LedPiBrightnessSensor,
+    LedPiLEDsSensor,
+    LedPiRGBNameSensor,
+    LedPiRGBSensor,
+)
+from tests.controller import StandInController
+
+BASELINE = pathlib.Path(__file__).parent / "baseline.json"
+
+STATE = {
+    ATTR_STATE: "on",
+    ATTR_BRIGHTNESS: 1.0,
+    ATTR_RGB_COLOR: "#ffffff",
+}
+
+
+async def command_round_trip(controller, iterations):
+    """Measure the median milliseconds until a command was posted."""
+    api = API(None, controller.host, command_delay=0, rate_limit=0)
+    api.data = dict(STATE)
+    durations = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        await api.set_brightness(i % 2, push=True)
+        durations.append(time.perf_counter() - start)
+    await api.async_close()
+    return statistics.median(durations) * 1000
+
+
+async def commands_per_second(controller, iterations):
+    """Measure the commands a device accepts per second when sent back to back."""
+    api = API(None, controller.host, command_delay=0, rate_limit=0)
+    api.data = dict(STATE)
+    start = time.perf_counter()
+    for i in range(iterations):
+        await api.set_brightness(i % 2, push=True)
+    elapsed = time.perf_counter() - start
+    await api.async_close()
+    return iterations / elapsed
+
+
+async def poll_cost(controller, iterations):
+    """Measure the median CPU milliseconds of a poll."""
+    api = API(None, controller.host, rate_limit=0)
+    durations = []
+    for i in range(iterations):
+        controller.set_state({ATTR_BRIGHTNESS: i % 2})
+        start = time.thread_time()
+        await api.update()
+        durations.append(time.thread_time() - start)
+    await api.async_close()
+    return statistics.median(durations) * 1000
+
+
+def entities(api):
+    """Create the entities of a device."""
+    coordinator = SimpleNamespace(last_update_success=True)
+    created = [
+        entity_class(api, coordinator, "name", "uuid")
+        for entity_class in (
+            LedPi,
+            LedPiRGBSensor,
+            LedPiRGBNameSensor,
+            LedPiLEDsSensor,
+            LedPiBrightnessSensor,
+        )
+    ]
+    for entity in created:
+        entity.async_write_ha_state = lambda: None
+    return created
+
+
+def fan_out_cost(iterations):
+    """Measure the microseconds to dispatch a coordinator update to an entity."""
+    api = API(None, "host")
+    devices = entities(api)
+    start = time.perf_counter()
+    for i in range(iterations):
+        api.data = {**STATE, ATTR_BRIGHTNESS: i % 2}
+        api.changed = True
+        for entity in devices:
+            entity._handle_coordinator_update()
+    elapsed = time.perf_counter() - start
+    return elapsed / (iterations * len(devices)) * 1_000_000
+
+
+def memory_per_device(devices):
+    """Measure the KiB allocated for a device with its entities."""
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    created = []
+    for _ in range(devices):
+        api = API(None, "host")
+        api.data = dict(STATE)
+        created.append((api, entities(api)))
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    return allocated / devices / 1024
+
+
+async def run(args):
+    """Run all benchmarks."""
+    controller = StandInController(latency=args.latency, jitter=args.jitter)
+    await controller.start()
+    try:
+        results = {
+            "command_round_trip_ms": (
+                await command_round_trip(controller, args.iterations),
+                False,
+            ),
+            "commands_per_second": (
+                await commands_per_second(controller, args.iterations),
+                True,
+            ),
+            "poll_cpu_ms": (await poll_cost(controller, args.iterations), False),
+        }
+    finally:
+        await controller.stop()
+    results["fan_out_us_per_entity"] = (fan_out_cost(args.iterations * 10), False)
+    results["memory_kib_per_device"] = (memory_per_device(100), False)
+    return {
+        name: {"value": round(value, 3), "higher_is_better": higher_is_better}
+        for name, (value, higher_is_better) in results.items()
+    }
+
+
+def regressions(results, baseline, tolerance):
+    """Get the metrics which are worse than the baseline by more than the tolerance."""
+    regressed = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        expected = baseline[name]["value"]
+        if result["higher_is_better"]:
+            worse = result["value"] * tolerance < expected
+        else:
+            worse = result["value"] > expected * tolerance
+        if worse:
+            regressed.append(name)
+    return regressed
+
+
+def main():
+    """Run the benchmarks and compare or store the baseline."""
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.005)
+    parser.add_argument("--jitter", type=float, default=0.002)
+    parser.add_argument("--tolerance", type=float, default=1.5)
+    parser.add_argument("--update", action="store_true", help="store as baseline")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    baseline = json.loads(BASELINE.read_text()) if BASELINE.exists() else {}
+    for name, result in results.items():
+        expected = baseline.get(name, {}).get("value")
+        print(f"{name:24} {result['value']:>12} (baseline: {expected})")
+
+    if args.update:
+        BASELINE.write_text(json.dumps(results, indent=2) + "\n")
+        return 0
+    regressed = regressions(results, baseline, args.tolerance)
+    if regressed:
+        print(f"Regressed: {', '.join(regressed)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,14 +4,46 @@ import logging
 import voluptuous as vol
 from datetime import timedelta
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import CONF_HOST, CONF_NAME, CONF_SCAN_INTERVAL
-from homeassistant.core import HomeAssistant
+from homeassistant.const import (
+    CONF_HOST,
+    CONF_NAME,
+    CONF_SCAN_INTERVAL,
+    EVENT_HOMEASSISTANT_STOP,
+)
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers import config_validation as cv
 from homeassistant.helpers.debounce import Debouncer
-from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+from homeassistant.helpers.storage import Store
 
 from .api import API
-from .const import DOMAIN, LEDPI_API, LEDPI_COORDINATOR
+from .breaker import CircuitBreaker
+from .const import (
+    CONF_BOOST_DURATION,
+    CONF_COMMAND_DELAY,
+    CONF_CONNECT_TIMEOUT,
+    CONF_FAILURE_THRESHOLD,
+    CONF_MAX_STATE_AGE,
+    CONF_MIN_SCAN_INTERVAL,
+    CONF_OPTIMISTIC,
+    CONF_PUSH,
+    CONF_RATE_LIMIT,
+    CONF_READ_TIMEOUT,
+    CONF_RESET_TIMEOUT,
+    CONF_STREAM_PORT,
+    CONF_TRACE_SIZE,
+    DEFAULT_OPTIONS,
+    DOMAIN,
+    LEDPI_API,
+    LEDPI_COORDINATOR,
+    LEDPI_SCHEDULER,
+    STORAGE_KEY,
+    STORAGE_SAVE_DELAY,
+    STORAGE_VERSION,
+)
+from .coordinator import LedPiCoordinator
+from .push import EventStream
+from .scheduler import PollScheduler
+from .services import async_setup_services
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -36,31 +68,74 @@ PLATFORMS = ("light", "sensor")
 async def async_setup(hass: HomeAssistant, config: dict):
     """Set up LED-Pi component via configuration.yaml."""
     hass.data.setdefault(DOMAIN, {})
+    hass.data[DOMAIN].setdefault(LEDPI_SCHEDULER, PollScheduler())
+
+    async_setup_services(hass)
     return True
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
     """Set up LED-Pi from a config entry."""
     hass.data.setdefault(DOMAIN, {})
+    scheduler = hass.data[DOMAIN].setdefault(LEDPI_SCHEDULER, PollScheduler())
 
     name = entry.data[CONF_NAME]
     host = entry.data[CONF_HOST]
     scan_interval = entry.data[CONF_SCAN_INTERVAL]
+    options = {**DEFAULT_OPTIONS, **entry.options}
 
     _LOGGER.debug("Setting up %s integration with host %s as %s", DOMAIN, host, name)
 
-    led_api = API(hass, host)
-    await led_api.update()
+    led_api = API(
+        hass,
+        host,
+        command_delay=options[CONF_COMMAND_DELAY] / 1000,
+        optimistic=options[CONF_OPTIMISTIC],
+        stream_port=options[CONF_STREAM_PORT],
+        trace_size=options[CONF_TRACE_SIZE],
+        rate_limit=options[CONF_RATE_LIMIT],
+        max_state_age=options[CONF_MAX_STATE_AGE],
+        connect_timeout=options[CONF_CONNECT_TIMEOUT],
+        read_timeout=options[CONF_READ_TIMEOUT],
+        breaker=CircuitBreaker(
+            failure_threshold=options[CONF_FAILURE_THRESHOLD],
+            reset_timeout=options[CONF_RESET_TIMEOUT],
+        ),
+    )
 
-    coordinator = DataUpdateCoordinator(
+    store = _async_get_store(hass, entry)
+    last_state = await store.async_load()
+    if last_state:
+        _LOGGER.debug("Restoring last known state of %s", name)
+        await led_api.update(last_state, confirmed=False)
+
+    coordinator = LedPiCoordinator(
         hass,
         _LOGGER,
-        name=name,
-        update_method=led_api.update,
-        update_interval=timedelta(minutes=scan_interval),
+        led_api,
+        name,
+        min_interval=timedelta(seconds=options[CONF_MIN_SCAN_INTERVAL]),
+        max_interval=timedelta(minutes=scan_interval),
+        boost_duration=timedelta(seconds=options[CONF_BOOST_DURATION]),
         request_refresh_debouncer=Debouncer(hass, _LOGGER, cooldown=0, immediate=True),
+        scheduler=scheduler,
+        jitter=scheduler.jitter(entry.entry_id),
     )
 
+    @callback
+    def _async_save_state():
+        """Persist the last known state if it changed."""
+        if led_api.changed and led_api.data:
+            store.async_delay_save(lambda: dict(led_api.data), STORAGE_SAVE_DELAY)
+
+    entry.async_on_unload(coordinator.async_add_listener(_async_save_state))
+    hass.async_create_task(coordinator.async_refresh())
+
+    if options[CONF_PUSH]:
+        stream = EventStream(led_api, coordinator)
+        stream.start()
+        entry.async_on_unload(stream.stop)
+
     hass.data[DOMAIN][entry.entry_id] = {
         LEDPI_API: led_api,
         LEDPI_COORDINATOR: coordinator,
@@ -71,9 +146,23 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
             hass.config_entries.async_forward_entry_setup(entry, platform),
         )
 
+    async def _async_close(_event):
+        """Close the connections to the controller."""
+        await led_api.async_close()
+
+    entry.async_on_unload(
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, _async_close)
+    )
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
+
     return True
 
 
+async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry):
+    """Reload a config entry after its options changed."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry):
     """Unload a config entry."""
     unload_ok = all(
@@ -85,6 +174,17 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry):
         )
     )
     if unload_ok:
-        hass.data[DOMAIN].pop(entry.entry_id)
+        data = hass.data[DOMAIN].pop(entry.entry_id)
+        await data[LEDPI_API].async_close()
 
     return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry):
+    """Remove the persisted state of a config entry."""
+    await _async_get_store(hass, entry).async_remove()
+
+
+def _async_get_store(hass: HomeAssistant, entry: ConfigEntry):
+    """Get the store persisting the last known state of a config entry."""
+    return Store(hass, STORAGE_VERSION, f"{STORAGE_KEY}.{entry.entry_id}")
@@ -1,11 +1,54 @@
 """API for the LED-Pi integration."""
+import asyncio
+import hashlib
+import itertools
+import json
 import logging
+import math
+import random
 import sys
+import time
 import webcolors
+from urllib.parse import urlsplit
+from aiohttp import ClientSession, ClientTimeout, TCPConnector, hdrs
 from homeassistant.components.light import ATTR_RGB_COLOR, ATTR_BRIGHTNESS
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.aiohttp_client import SERVER_SOFTWARE
+from homeassistant.util import dt as dt_util
 
-from .const import ATTR_LEDS, ATTR_STATE
+from .breaker import CircuitBreaker
+from .effects import EFFECTS, EffectRunner
+from .metrics import METHOD_GET, METHOD_POST, Metrics
+from .ratelimit import (
+    PRIORITY_FRAME,
+    PRIORITY_POLL,
+    PRIORITY_SAFETY,
+    PRIORITY_USER,
+    RateLimiter,
+)
+from .realtime import RealtimeStream
+from .transition import Transition, interpolate
+from .const import (
+    ATTR_PIXELS,
+    ATTR_STATE,
+    DEFAULT_COMMAND_DELAY,
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_DNS_CACHE_TTL,
+    DEFAULT_ERROR_LOG_INTERVAL,
+    DEFAULT_FRAME_INTERVAL,
+    DEFAULT_KEEPALIVE_TIMEOUT,
+    DEFAULT_MAX_CONNECTIONS,
+    DEFAULT_MAX_RETRIES,
+    DEFAULT_MAX_STATE_AGE,
+    DEFAULT_OPTIMISTIC,
+    DEFAULT_RATE_LIMIT,
+    DEFAULT_READ_TIMEOUT,
+    DEFAULT_RETRY_DELAY,
+    DEFAULT_STREAM_IDLE_TIMEOUT,
+    DEFAULT_STREAM_PORT,
+    DEFAULT_TRACE_SIZE,
+)
+from .state import LedPiState
+from .trace import Trace
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -13,124 +56,699 @@ _LOGGER = logging.getLogger(__name__)
 class API:
     """API representation for a LED-Pi Light."""
 
-    def __init__(self, hass, host):
+    def __init__(
+        self,
+        hass,
+        host,
+        command_delay=DEFAULT_COMMAND_DELAY / 1000,
+        optimistic=DEFAULT_OPTIMISTIC,
+        stream_port=DEFAULT_STREAM_PORT,
+        connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+        read_timeout=DEFAULT_READ_TIMEOUT,
+        breaker=None,
+        trace_size=DEFAULT_TRACE_SIZE,
+        rate_limit=DEFAULT_RATE_LIMIT,
+        max_retries=DEFAULT_MAX_RETRIES,
+        retry_delay=DEFAULT_RETRY_DELAY,
+        max_state_age=DEFAULT_MAX_STATE_AGE,
+    ):
         """Initialize the API."""
         self.hass = hass
         self.host = host
         self.verify_tls = False
         self.data = {}
+        self.changed = False
+        self.command_delay = command_delay
+        self.optimistic = optimistic
+        self.timeout = ClientTimeout(connect=connect_timeout, sock_read=read_timeout)
+        self.breaker = breaker or CircuitBreaker()
+        self.metrics = Metrics()
+        self.trace = Trace(trace_size)
+        self.limiter = RateLimiter(rate_limit) if rate_limit else None
+        self.stream_port = stream_port
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.max_state_age = max_state_age
+        self._session = None
+        self._stream = None
+        self._stream_state = {}
+        self._animation = None
+        self.effect = None
+        self.effect_runner = None
+        self.pixels = None
+        self._pending_state = {}
+        self._pending_flush = None
+        self._pending_since = 0.0
+        self._retry_wakeup = None
+        self._turning_off = None
+        self._send_lock = asyncio.Lock()
+        self._etag = None
+        self._last_modified = None
+        self._digest = None
+        self._confirmed = {}
+        self._confirmed_at = None
+        self._logged_at = None
+        self._suppressed = 0
 
-    async def update(self, data=None):
-        """Update the entity."""
+    async def update(self, data=None, confirmed=True):
+        """Update the entity.
+
+        The state is only parsed if it changed since the last update, detected by
+        the ETag or Last-Modified headers or otherwise a digest of the body.
+        A given state counts as confirmed by the controller unless stated
+        otherwise, e.g. for a state restored from storage.
+        """
         if data is not None:
             self.data = data
+            self.changed = True
+            self._reset_change_detection()
+            if confirmed:
+                self._confirm(data)
+        elif not await self._acquire(PRIORITY_POLL):
+            _LOGGER.debug("Skipping update of %s: too many requests", self.host)
+            self.changed = False
+        elif not self.breaker.allow_request():
+            _LOGGER.debug("Skipping update of %s: circuit breaker is open", self.host)
+            self.changed = False
         else:
-            session = async_get_clientsession(self.hass, self.verify_tls)
             try:
-                async with session.get(f"http://{self.host}/api/v1/state") as response:
-                    self.data = await response.json()
+                await self._fetch_state(self._get_session())
+            except asyncio.CancelledError:
+                self.breaker.release()
+                raise
             except:
-                _LOGGER.error(
-                    "Could not fetch state from %s: %s", self.host, sys.exc_info()[0]
+                self.breaker.record_failure()
+                self.metrics.record_error(sys.exc_info()[1])
+                self._log(
+                    logging.ERROR,
+                    "Could not fetch state from %s: %s",
+                    self.host,
+                    sys.exc_info()[0],
                 )
                 self.data = {}
+                self.changed = True
+                self._reset_change_detection()
+                self._confirmed = {}
+                self._confirmed_at = None
+            else:
+                self.breaker.record_success()
+                self.metrics.last_poll = dt_util.utcnow()
+
+    @property
+    def available(self):
+        """Check if the host is considered reachable."""
+        return self.breaker.available
+
+    def _log(self, level: int, msg: str, *args):
+        """Log a problem with the host, at most once per error log interval.
+
+        Repeated problems are logged at debug level in between and counted in the
+        next message, so an unreachable LED-Pi does not flood the log.
+        """
+        now = time.monotonic()
+        if (
+            self._logged_at is not None
+            and now - self._logged_at < DEFAULT_ERROR_LOG_INTERVAL
+        ):
+            self._suppressed += 1
+            _LOGGER.debug(msg, *args)
+            return
+        if self._suppressed:
+            msg += " (%d more since the last message)"
+            args = (*args, self._suppressed)
+        _LOGGER.log(level, msg, *args)
+        self._logged_at = now
+        self._suppressed = 0
+
+    def _get_session(self):
+        """Get the session keeping connections to the host alive.
+
+        The session has its own connection pool, limiting and reusing the
+        connections to the host and caching its DNS resolution.
+        """
+        if self._session is None or self._session.closed:
+            connector = TCPConnector(
+                limit_per_host=DEFAULT_MAX_CONNECTIONS,
+                keepalive_timeout=DEFAULT_KEEPALIVE_TIMEOUT,
+                use_dns_cache=True,
+                ttl_dns_cache=DEFAULT_DNS_CACHE_TTL,
+                ssl=None if self.verify_tls else False,
+            )
+            self._session = ClientSession(
+                connector=connector, headers={hdrs.USER_AGENT: SERVER_SOFTWARE}
+            )
+        return self._session
+
+    async def async_close(self):
+        """Close the realtime stream, the session and its connections."""
+        self.cancel_animation()
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    async def events(self):
+        """Yield the states pushed by the controller as Server-Sent Events.
+
+        The stream holds its connection open, so it gets a session of its own
+        instead of taking one of the connections polls and commands share.
+        """
+        session = ClientSession(
+            connector=TCPConnector(limit=1, ssl=None if self.verify_tls else False),
+            headers={hdrs.USER_AGENT: SERVER_SOFTWARE},
+        )
+        async with session, session.get(
+            f"http://{self.host}/api/v1/events",
+            headers={hdrs.ACCEPT: "text/event-stream"},
+            timeout=ClientTimeout(
+                connect=self.timeout.connect, sock_read=DEFAULT_STREAM_IDLE_TIMEOUT
+            ),
+            raise_for_status=True,
+        ) as response:
+            data = []
+            async for line in response.content:
+                line = line.decode().rstrip("\r\n")
+                if line.startswith("data:"):
+                    data.append(line[5:].lstrip(" "))
+                elif not line and data:
+                    yield json.loads("\n".join(data))
+                    data = []
+
+    async def _fetch_state(self, session):
+        """Fetch the state and parse it if it changed."""
+        start = time.monotonic()
+        try:
+            async with session.get(
+                f"http://{self.host}/api/v1/state",
+                headers=self._conditional_headers(),
+                timeout=self.timeout,
+                raise_for_status=True,
+            ) as response:
+                if response.status == 304:
+                    network = time.monotonic() - start
+                    self.metrics.record_request(METHOD_GET, network)
+                    self.trace.record(METHOD_GET, 0, network=network)
+                    self.changed = False
+                    self._confirm(self._confirmed)
+                    return
+                body = await response.read()
+                network = time.monotonic() - start
+                self.metrics.record_request(METHOD_GET, network, received=len(body))
+                digest = hashlib.blake2b(body, digest_size=16).digest()
+                if digest == self._digest:
+                    self.trace.record(METHOD_GET, len(body), network=network)
+                    self.changed = False
+                    self._confirm(self._confirmed)
+                    return
+                self.data = json.loads(body)
+                self._confirm(self.data)
+                self.trace.record(
+                    METHOD_GET,
+                    len(body),
+                    network=network,
+                    parse=time.monotonic() - start - network,
+                )
+                self.changed = True
+                self._etag = response.headers.get(hdrs.ETAG)
+                self._last_modified = response.headers.get(hdrs.LAST_MODIFIED)
+                self._digest = digest
+        except:
+            self.trace.record(
+                METHOD_GET,
+                0,
+                network=time.monotonic() - start,
+                error=sys.exc_info()[0].__name__,
+            )
+            raise
+
+    def _confirm(self, state: dict):
+        """Remember the state the controller confirmed just now."""
+        self._confirmed = state
+        self._confirmed_at = time.monotonic()
+
+    def _is_redundant(self, state: dict):
+        """Check if posting the state would not change the controller's state.
+
+        The state is compared to the confirmed state with the pending commands
+        applied, as long as it is not older than the maximum state age. Nothing is
+        redundant while a request is in flight, or an animation or stream runs.
+        """
+        if (
+            not self.max_state_age
+            or self._confirmed_at is None
+            or time.monotonic() - self._confirmed_at > self.max_state_age
+            or self._send_lock.locked()
+            or self._animation is not None
+            or self._stream is not None
+        ):
+            return False
+        expected = {**self._confirmed, **self._pending_state}
+        return all(
+            key in expected and _encode(expected[key]) == _encode(value)
+            for key, value in state.items()
+        )
+
+    def _reset_change_detection(self):
+        """Fetch and parse the next state, as the local state diverged."""
+        self._etag = None
+        self._last_modified = None
+        self._digest = None
+
+    def _conditional_headers(self):
+        """Get the headers to only fetch the state if it changed."""
+        if self._etag is not None:
+            return {hdrs.IF_NONE_MATCH: self._etag}
+        if self._last_modified is not None:
+            return {hdrs.IF_MODIFIED_SINCE: self._last_modified}
+        return {}
+
+    @property
+    def data(self):
+        """Get the raw state."""
+        return self._data
+
+    @data.setter
+    def data(self, data):
+        """Set the raw state and parse its snapshot."""
+        self._data = data
+        self.state = LedPiState(data)
 
     def is_on(self):
-        """Check if the light is on."""
-        if ATTR_STATE not in self.data:
-            raise UnknownStateException("no_state")
-        return self.data.get(ATTR_STATE) == "on"
+        """Check if the light is on, None if unknown."""
+        return self.state.is_on
 
-    async def set_rgb(self, rgb_color: tuple, push=False):
+    async def set_rgb(self, rgb_color: tuple, push=False, force=False):
         color = webcolors.rgb_to_hex(rgb_color)
-        self.data[ATTR_RGB_COLOR] = color
+        self.data = {**self.data, ATTR_RGB_COLOR: color}
+        self._reset_change_detection()
         if push:
             await self._post_state(
                 {
                     ATTR_RGB_COLOR: color,
-                }
+                },
+                force=force,
             )
 
     def rgb_hex_color(self):
-        """Get the RGB Hex color."""
-        if ATTR_RGB_COLOR not in self.data:
-            raise UnknownStateException("no_rgb_hex_color")
-        return self.data.get(ATTR_RGB_COLOR)
+        """Get the RGB Hex color, None if unknown."""
+        return self.state.rgb_hex_color
 
     def rgb_color(self):
-        """Get the RGB color."""
-        try:
-            colors = webcolors.hex_to_rgb(self.rgb_hex_color())
-            return [colors.red, colors.green, colors.blue]
-        except:
-            _LOGGER.error(
-                "Could not convert HEX %s to RGB: %s",
-                self.rgb_hex_color(),
-                sys.exc_info()[0],
-            )
-            raise UnknownStateException("no_rgb_color")
+        """Get the RGB color, None if unknown."""
+        return self.state.rgb_color
 
     def rgb_name(self):
-        """Get the RGB color name."""
-        try:
-            return webcolors.hex_to_name(self.rgb_hex_color())
-        except:
-            _LOGGER.error(
-                "Could not convert HEX %s to color name: %s",
-                self.rgb_hex_color(),
-                sys.exc_info()[0],
-            )
-            raise UnknownStateException("no_rgb_name_color")
+        """Get the RGB color name, None if unknown."""
+        return self.state.rgb_name
 
     def brightness(self):
-        """Get the brightness."""
-        if ATTR_BRIGHTNESS not in self.data:
-            raise UnknownStateException("no_brightness")
-        return self.data.get(ATTR_BRIGHTNESS)
+        """Get the brightness, None if unknown."""
+        return self.state.brightness
 
-    async def set_brightness(self, brightness: float, push=False):
-        self.data[ATTR_BRIGHTNESS] = brightness
+    async def set_brightness(self, brightness: float, push=False, force=False):
+        self.data = {**self.data, ATTR_BRIGHTNESS: brightness}
+        self._reset_change_detection()
         if push:
             await self._post_state(
                 {
                     ATTR_BRIGHTNESS: brightness,
-                }
+                },
+                force=force,
             )
 
     def leds(self):
-        """Get the number of LEDs."""
-        if ATTR_LEDS not in self.data:
+        """Get the number of LEDs, None if unknown."""
+        return self.state.leds
+
+    async def set_segment(
+        self, index: int, count: int, rgb_color: tuple = None, force=False
+    ):
+        """Write a segment into the frame buffer and queue a batched write.
+
+        The strip is split into count segments of equal size, the last one takes
+        the remaining LEDs. With more segments than LEDs, each of the first
+        segments gets one LED and the rest get none. A segment without a color
+        is turned off. Segments changed within the command delay are posted as a
+        single request.
+        """
+        leds = self.state.leds
+        if leds is None:
             raise UnknownStateException("no_leds")
-        return self.data.get(ATTR_LEDS)
-
-    async def turn_on(self):
-        """Turn the light on."""
-        await self._post_state(
-            {
-                ATTR_STATE: "on",
-                ATTR_BRIGHTNESS: self.brightness(),
-                ATTR_RGB_COLOR: self.rgb_hex_color(),
-            }
-        )
+        if self.pixels is None or len(self.pixels) != leds * 3:
+            self.pixels = bytearray(leds * 3)
+        count = min(count, leds)
+        if index >= count:
+            return
+        size = leds // count
+        start = index * size
+        end = leds if index == count - 1 else start + size
+        self.pixels[start * 3 : end * 3] = bytes(rgb_color or (0, 0, 0)) * (end - start)
+        state = {ATTR_PIXELS: self.pixels}
+        if rgb_color is not None:
+            state[ATTR_STATE] = "on"
+        await self._post_state(state, force=force)
 
-    async def turn_off(self):
+    async def turn_on(self, force=False):
+        """Turn the light on with the known brightness and color."""
+        state = {ATTR_STATE: "on"}
+        if self.state.brightness is not None:
+            state[ATTR_BRIGHTNESS] = self.state.brightness
+        if self.state.rgb_hex_color is not None:
+            state[ATTR_RGB_COLOR] = self.state.rgb_hex_color
+        await self._post_state(state, force=force)
+
+    async def turn_off(self, force=False):
         """Turn the light off."""
-        await self._post_state({ATTR_STATE: "off"})
+        await self._post_state({ATTR_STATE: "off"}, force=force)
+
+    async def transition(
+        self, duration: float, brightness=None, rgb_color: tuple = None, turn_off=False
+    ):
+        """Start fading from the current state to the target.
+
+        The transition runs in the background until it ends or a newer command
+        cancels it. Turning off fades to zero and restores the brightness.
+        """
+        self.cancel_animation()
+        is_on = bool(self.state.is_on)
+        current = self.state.brightness if self.state.brightness is not None else 1.0
+        start_brightness = current if is_on else 0.0
+        start_rgb = self.state.rgb_color or rgb_color or (255, 255, 255)
+        if turn_off:
+            brightness = 0.0
+        elif brightness is None:
+            brightness = current
+
+        frames = interpolate(
+            start_brightness,
+            brightness,
+            start_rgb,
+            rgb_color or start_rgb,
+            max(1, math.ceil(duration / DEFAULT_FRAME_INTERVAL)),
+        )
+        if turn_off:
+            frames[-1] = {ATTR_STATE: "off", ATTR_BRIGHTNESS: current}
+        else:
+            frames[0][ATTR_STATE] = "on"
+        self._animation = asyncio.ensure_future(
+            Transition(frames, duration).run(self._send_frame)
+        )
+
+    async def start_effect(self, name: str):
+        """Start playing an effect in the background until a newer command.
 
-    async def _post_state(self, state):
-        """Post the desired state."""
-        session = async_get_clientsession(self.hass, self.verify_tls)
+        The effect uses the current color and the number of LEDs.
+        """
+        self.cancel_animation()
+        frames = EFFECTS[name](self.state.leds, self.state.rgb_color or (255, 255, 255))
+        frame = next(frames)
+        self.effect_runner = EffectRunner(
+            name, itertools.chain([{**frame, ATTR_STATE: "on"}], frames)
+        )
+        self.effect = name
+        self._animation = asyncio.ensure_future(
+            self.effect_runner.run(self._send_frame)
+        )
+
+    def cancel_animation(self):
+        """Cancel the running transition or effect, dropping its remaining frames."""
+        if self._animation is not None and not self._animation.done():
+            self._animation.cancel()
+        self._animation = None
+        self.effect = None
+
+    async def async_send_state(self, state, force=False):
+        """Post a state right away and apply it locally once accepted.
+
+        Unlike commands, the state is not merged with other commands and the
+        caller decides whether to refresh. Returns if the state was accepted. A
+        state matching the confirmed state is not posted unless forced.
+        """
+        if not force and self._is_redundant(state):
+            self.metrics.skipped += 1
+            return True
+        self.cancel_animation()
+        # older pending commands must not overwrite the state once it is posted
+        for field in state:
+            self._pending_state.pop(field, None)
+        await self._acquire(PRIORITY_USER)
+        async with self._send_lock:
+            return await self._send_state(state, apply=True)
+
+    async def _send_frame(self, state):
+        """Post a frame right away, or drop it if too many requests are queued."""
+        if await self._acquire(PRIORITY_FRAME):
+            async with self._send_lock:
+                await self._send_state(state)
+
+    async def _acquire(self, priority: int):
+        """Wait until the rate limit allows a request, False if it was dropped."""
+        if self.limiter is None:
+            return True
+        return await self.limiter.acquire(priority)
+
+    @property
+    def streaming(self):
+        """Check if colors are streamed in realtime."""
+        return self._stream is not None
+
+    async def start_stream(self):
+        """Start streaming colors in realtime over UDP."""
+        if self._stream is not None:
+            return
+        self.cancel_animation()
+        _, self._stream = await asyncio.get_running_loop().create_datagram_endpoint(
+            RealtimeStream,
+            remote_addr=(urlsplit(f"//{self.host}").hostname, self.stream_port),
+        )
+        self._stream_state = {}
+
+    def stream_frame(self, rgb_color: tuple = None, brightness=None, pixels=None):
+        """Stream a frame without waiting for it to be delivered.
+
+        Unset values default to the last known state. Pixels are RGB bytes for
+        each LED and take precedence over the color. Returns False if the frame
+        was dropped.
+        """
+        if self._stream is None:
+            return False
+        if brightness is None:
+            brightness = self._stream_state.get(ATTR_BRIGHTNESS, self.state.brightness)
+        if brightness is None:
+            brightness = 1.0
+        self._stream_state[ATTR_BRIGHTNESS] = brightness
+
+        if pixels is not None:
+            if self.state.leds is not None and len(pixels) != self.state.leds * 3:
+                raise ValueError(
+                    f"Expected {self.state.leds * 3} bytes of pixels, got {len(pixels)}"
+                )
+            return self._stream.send(brightness, bytes(pixels), pixels=True)
+
+        if rgb_color is None:
+            rgb_color = self._stream_state.get(ATTR_RGB_COLOR, self.state.rgb_color)
+        if rgb_color is None:
+            rgb_color = (255, 255, 255)
+        self._stream_state[ATTR_RGB_COLOR] = tuple(rgb_color)
+        return self._stream.send(brightness, bytes(rgb_color))
+
+    async def stop_stream(self):
+        """Stop streaming and post the last streamed color and brightness."""
+        if self._stream is None:
+            return
+        self._stream.close()
+        self._stream = None
+        state = {}
+        if ATTR_RGB_COLOR in self._stream_state:
+            state[ATTR_RGB_COLOR] = webcolors.rgb_to_hex(
+                self._stream_state[ATTR_RGB_COLOR]
+            )
+        if ATTR_BRIGHTNESS in self._stream_state:
+            state[ATTR_BRIGHTNESS] = self._stream_state[ATTR_BRIGHTNESS]
+        if state:
+            await self._post_state(state)
+
+    async def _post_state(self, state, force=False):
+        """Queue the desired state and wait until it has been posted.
+
+        Commands queued within the command delay are merged, the latest value of
+        each field wins, and are posted as a single request. A running transition
+        is cancelled. Commands matching the confirmed state are dropped unless
+        forced.
+        """
+        if not force and self._is_redundant(state):
+            _LOGGER.debug("Skipping state update for %s: already applied", self.host)
+            self.metrics.skipped += 1
+            return
+        self.cancel_animation()
+        self._pending_state.update(state)
+        if (
+            state.get(ATTR_STATE) == "off"
+            and self._turning_off is not None
+            and not self._turning_off.done()
+        ):
+            self._turning_off.set_result(None)
+        if self._retry_wakeup is not None and not self._retry_wakeup.done():
+            self._retry_wakeup.set_result(None)
+        if self._pending_flush is None:
+            self._pending_since = time.monotonic()
+            self._pending_flush = asyncio.ensure_future(self._flush_state())
+        await asyncio.shield(self._pending_flush)
+
+    async def _flush_state(self):
+        """Post all pending fields once the command delay has passed.
+
+        A failed update is retried with exponential backoff and jitter. Once a
+        newer command is queued, the retry is cancelled and the failed fields are
+        merged under the newer ones to be posted with them.
+        """
+        await asyncio.sleep(self.command_delay)
+        # the rate limit is waited for before the lock, so that requests are
+        # ordered by their priority, and commands queued meanwhile are merged
+        await self._acquire_command()
+        async with self._send_lock:
+            state = self._pending_state
+            self._pending_state = {}
+            self._pending_flush = None
+            if not state:
+                return
+            if ATTR_PIXELS in state:
+                state[ATTR_PIXELS] = _encode(state[ATTR_PIXELS])
+            accepted = await self._send_state(
+                state, queue_wait=time.monotonic() - self._pending_since
+            )
+            for attempt in range(self.max_retries):
+                if accepted or not self.breaker.available:
+                    return
+                if await self._wait_queued(
+                    self.retry_delay * 2**attempt * random.uniform(0.5, 1.0)
+                ):
+                    _LOGGER.debug(
+                        "Cancelling retry for %s: superseded by a newer command",
+                        self.host,
+                    )
+                    self._pending_state = {**state, **self._pending_state}
+                    return
+                self.metrics.retries += 1
+                _LOGGER.debug("Retrying state update for %s", self.host)
+                accepted = await self._send_state(state)
+
+    async def _acquire_command(self):
+        """Wait until the rate limit allows posting the pending command.
+
+        Turning off is sent first. If the light is turned off while the command
+        waits, the command is sent with the priority of turning off.
+        """
+        if self._pending_state.get(ATTR_STATE) == "off":
+            await self._acquire(PRIORITY_SAFETY)
+            return
+        acquire = asyncio.ensure_future(self._acquire(PRIORITY_USER))
+        self._turning_off = asyncio.get_running_loop().create_future()
         try:
-            await session.post(f"http://{self.host}/api/v1/state", json=state)
+            await asyncio.wait(
+                (acquire, self._turning_off), return_when=asyncio.FIRST_COMPLETED
+            )
+        finally:
+            self._turning_off = None
+            escalated = not acquire.done() and acquire.cancel()
+        if escalated:
+            await self._acquire(PRIORITY_SAFETY)
+
+    async def _wait_queued(self, timeout):
+        """Wait up to timeout seconds and return if a newer command was queued.
+
+        Newer commands are pending as the send lock is held while retrying.
+        """
+        if not self._pending_state:
+            self._retry_wakeup = asyncio.get_running_loop().create_future()
+            try:
+                await asyncio.wait_for(self._retry_wakeup, timeout)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                self._retry_wakeup = None
+        return bool(self._pending_state)
+
+    async def _send_state(self, state, queue_wait=0.0, apply=False):
+        """Post the desired state and return if it was accepted.
+
+        The state is applied locally in optimistic mode or if requested.
+        """
+        if not self.breaker.allow_request():
+            self._log(
+                logging.WARNING,
+                "Dropping state update for %s: circuit breaker is open",
+                self.host,
+            )
+            return False
+        body = json.dumps(state).encode()
+        start = time.monotonic()
+        try:
+            async with self._get_session().post(
+                f"http://{self.host}/api/v1/state",
+                data=body,
+                headers={hdrs.CONTENT_TYPE: "application/json"},
+                timeout=self.timeout,
+                raise_for_status=True,
+            ) as response:
+                network = time.monotonic() - start
+                self.metrics.record_request(METHOD_POST, network, sent=len(body))
+                if self.optimistic or apply:
+                    await self._apply_state(state, response)
+                self.trace.record(
+                    METHOD_POST,
+                    len(body),
+                    queue_wait=queue_wait,
+                    network=network,
+                    parse=time.monotonic() - start - network,
+                )
+        except asyncio.CancelledError:
+            self.breaker.release()
+            raise
         except:
-            _LOGGER.error(
-                "Could not update state for %s: %s", self.host, sys.exc_info()[0]
+            self.breaker.record_failure()
+            self.metrics.record_error(sys.exc_info()[1])
+            self.trace.record(
+                METHOD_POST,
+                len(body),
+                queue_wait=queue_wait,
+                network=time.monotonic() - start,
+                error=sys.exc_info()[0].__name__,
             )
+            self._log(
+                logging.ERROR,
+                "Could not update state for %s: %s",
+                self.host,
+                sys.exc_info()[0],
+            )
+            return False
+        self.breaker.record_success()
+        self._confirm({**self._confirmed, **state})
+        return True
+
+    async def _apply_state(self, state, response):
+        """Apply a posted state locally, preferring the controller's response."""
+        try:
+            data = await response.json()
+        except asyncio.CancelledError:
+            raise
+        except:
+            data = None
+        if isinstance(data, dict) and data:
+            self.data = data
+        else:
+            self.data = {**self.data, **state}
+        self.changed = True
+        self._reset_change_detection()
 
 
-class UnknownStateException(Exception):
-    """State if the light is unknown."""
+def _encode(value):
+    """Encode a value as it is posted, pixels as HEX."""
+    if isinstance(value, (bytes, bytearray)):
+        return value.hex()
+    return value
 
-    def __init__(self, msg):
-        super().__init__(msg)
-        _LOGGER.error("Unknown state: %s", msg)
+
+class UnknownStateException(Exception):
+    """Command which needs a part of the state that is unknown."""
@@ -0,0 +1,66 @@
+"""Circuit breaker for the LED-Pi integration."""
+from time import monotonic
+
+from .const import DEFAULT_FAILURE_THRESHOLD, DEFAULT_RESET_TIMEOUT
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Circuit breaker failing requests fast while a host is unreachable.
+
+    After the failure threshold is reached the breaker opens and rejects all
+    requests for the reset timeout. Afterwards, a single probe request is let
+    through: it closes the breaker on success and opens it again on failure.
+    """
+
+    def __init__(
+        self,
+        failure_threshold=DEFAULT_FAILURE_THRESHOLD,
+        reset_timeout=DEFAULT_RESET_TIMEOUT,
+    ):
+        """Initialize the circuit breaker."""
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = STATE_CLOSED
+        self.failures = 0
+        self._opened_at = 0
+
+    @property
+    def available(self):
+        """Check if requests may reach the host."""
+        return self.state != STATE_OPEN
+
+    def allow_request(self):
+        """Check if a request may be sent, letting a single probe through."""
+        if self.state == STATE_CLOSED:
+            return True
+        if self.state == STATE_OPEN and (
+            monotonic() >= self._opened_at + self.reset_timeout
+        ):
+            self.state = STATE_HALF_OPEN
+            return True
+        return False
+
+    def record_success(self):
+        """Record a successful request."""
+        self.state = STATE_CLOSED
+        self.failures = 0
+
+    def release(self):
+        """Release a probe which ended without a result, e.g. as it was cancelled.
+
+        The breaker opens again without counting a failure, so the next request
+        is let through as probe.
+        """
+        if self.state == STATE_HALF_OPEN:
+            self.state = STATE_OPEN
+
+    def record_failure(self):
+        """Record a failed request."""
+        self.failures += 1
+        if self.state == STATE_HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = STATE_OPEN
+            self._opened_at = monotonic()
@@ -0,0 +1,88 @@
+"""Color helpers for the LED-Pi integration."""
+import webcolors
+from functools import lru_cache
+
+
+def rgb_to_lab(rgb: tuple) -> tuple:
+    """Convert an sRGB color to the perceptual CIELAB color space (D65)."""
+    linear = []
+    for channel in rgb:
+        value = channel / 255
+        if value > 0.04045:
+            linear.append(((value + 0.055) / 1.055) ** 2.4)
+        else:
+            linear.append(value / 12.92)
+    red, green, blue = linear
+
+    x = (0.4124 * red + 0.3576 * green + 0.1805 * blue) / 0.95047
+    y = 0.2126 * red + 0.7152 * green + 0.0722 * blue
+    z = (0.0193 * red + 0.1192 * green + 0.9505 * blue) / 1.08883
+
+    fx, fy, fz = (
+        value ** (1 / 3) if value > 0.008856 else 7.787 * value + 16 / 116
+        for value in (x, y, z)
+    )
+    return 116 * fy - 16, 500 * (fx - fy), 200 * (fy - fz)
+
+
+class NearestColorIndex:
+    """k-d tree over named colors in the CIELAB color space.
+
+    Each node is a tuple of the color, its name, the split axis and the left and
+    right subtrees.
+    """
+
+    __slots__ = ("_root",)
+
+    def __init__(self, colors: dict):
+        """Build the index from a mapping of names to RGB colors."""
+        points = [(rgb_to_lab(rgb), name) for name, rgb in colors.items()]
+        self._root = self._build(points, 0)
+
+    @classmethod
+    def _build(cls, points, axis):
+        """Build the subtree for the given points."""
+        if not points:
+            return None
+        points.sort(key=lambda point: point[0][axis])
+        median = len(points) // 2
+        next_axis = (axis + 1) % 3
+        return (
+            points[median][0],
+            points[median][1],
+            axis,
+            cls._build(points[:median], next_axis),
+            cls._build(points[median + 1 :], next_axis),
+        )
+
+    def nearest(self, rgb: tuple) -> str:
+        """Get the name of the nearest color."""
+        target = rgb_to_lab(rgb)
+        best_name, best_distance = None, float("inf")
+        # pairs of subtrees and the minimal distance of their colors on the axis
+        stack = [(self._root, 0)]
+        while stack:
+            node, bound = stack.pop()
+            if node is None or bound >= best_distance:
+                continue
+            color, name, axis, left, right = node
+            distance = sum((a - b) ** 2 for a, b in zip(color, target))
+            if distance < best_distance:
+                best_name, best_distance = name, distance
+
+            delta = target[axis] - color[axis]
+            near, far = (left, right) if delta < 0 else (right, left)
+            stack.append((far, delta**2))
+            stack.append((near, 0))
+        return best_name
+
+
+@lru_cache(maxsize=1)
+def css3_index() -> NearestColorIndex:
+    """Get an index over the CSS3 named colors."""
+    return NearestColorIndex(
+        {
+            name: tuple(webcolors.hex_to_rgb(hex_color))
+            for hex_color, name in webcolors.CSS3_HEX_TO_NAMES.items()
+        }
+    )
@@ -3,8 +3,26 @@ import homeassistant.helpers.config_validation as cv
 import voluptuous as vol
 from homeassistant import config_entries
 from homeassistant.const import CONF_HOST, CONF_NAME, CONF_SCAN_INTERVAL
+from homeassistant.core import callback
 
-from .const import DOMAIN
+from .const import (
+    CONF_BOOST_DURATION,
+    CONF_COMMAND_DELAY,
+    CONF_CONNECT_TIMEOUT,
+    CONF_FAILURE_THRESHOLD,
+    CONF_MAX_STATE_AGE,
+    CONF_MIN_SCAN_INTERVAL,
+    CONF_OPTIMISTIC,
+    CONF_PUSH,
+    CONF_RATE_LIMIT,
+    CONF_READ_TIMEOUT,
+    CONF_RESET_TIMEOUT,
+    CONF_SEGMENTS,
+    CONF_STREAM_PORT,
+    CONF_TRACE_SIZE,
+    DEFAULT_OPTIONS,
+    DOMAIN,
+)
 
 AUTH_SCHEMA = vol.Schema(
     {
@@ -14,6 +32,26 @@ AUTH_SCHEMA = vol.Schema(
     }
 )
 
+# options for which 0 would break polling or requests
+AT_LEAST_ONE = vol.All(vol.Coerce(int), vol.Range(min=1))
+
+OPTIONS = (
+    (CONF_COMMAND_DELAY, cv.positive_int),
+    (CONF_OPTIMISTIC, cv.boolean),
+    (CONF_MIN_SCAN_INTERVAL, AT_LEAST_ONE),
+    (CONF_BOOST_DURATION, cv.positive_int),
+    (CONF_CONNECT_TIMEOUT, AT_LEAST_ONE),
+    (CONF_READ_TIMEOUT, AT_LEAST_ONE),
+    (CONF_FAILURE_THRESHOLD, AT_LEAST_ONE),
+    (CONF_RESET_TIMEOUT, cv.positive_int),
+    (CONF_PUSH, cv.boolean),
+    (CONF_STREAM_PORT, cv.port),
+    (CONF_SEGMENTS, cv.positive_int),
+    (CONF_TRACE_SIZE, cv.positive_int),
+    (CONF_RATE_LIMIT, cv.positive_float),
+    (CONF_MAX_STATE_AGE, cv.positive_int),
+)
+
 
 class LedPiFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
     """Handle a config flow for LED-Pi."""
@@ -21,6 +59,12 @@ class LedPiFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
     VERSION = 1
     CONNECTION_CLASS = config_entries.CONN_CLASS_LOCAL_POLL
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry):
+        """Get the options flow for this handler."""
+        return LedPiOptionsFlowHandler(config_entry)
+
     async def async_step_user(self, user_input=None):
         """Handle a flow initiated by the user."""
         return await self.async_step_init(user_input)
@@ -61,3 +105,27 @@ class LedPiFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
             f"{entry.data.get(CONF_HOST)}" for entry in self._async_current_entries()
         ]
         return host in existing_hosts
+
+
+class LedPiOptionsFlowHandler(config_entries.OptionsFlow):
+    """Handle the options of a LED-Pi config entry."""
+
+    def __init__(self, config_entry):
+        """Initialize the options flow."""
+        self.config_entry = config_entry
+
+    async def async_step_init(self, user_input=None):
+        """Manage the options."""
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
+
+        options = {**DEFAULT_OPTIONS, **self.config_entry.options}
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema(
+                {
+                    vol.Required(key, default=options[key]): validator
+                    for key, validator in OPTIONS
+                }
+            ),
+        )
@@ -4,9 +4,120 @@ DOMAIN = "ledpi"
 
 LEDPI_API = "ledpi_api"
 LEDPI_COORDINATOR = "ledpi_coordinator"
+LEDPI_SCHEDULER = "ledpi_scheduler"
+
+STORAGE_KEY = f"{DOMAIN}.state"
+SNAPSHOTS_STORAGE_KEY = f"{DOMAIN}.snapshots"
+STORAGE_VERSION = 1
+# seconds to wait before persisting the last known state
+STORAGE_SAVE_DELAY = 10
+
+CONF_COMMAND_DELAY = "command_delay"
+CONF_OPTIMISTIC = "optimistic"
+CONF_MIN_SCAN_INTERVAL = "min_scan_interval"
+CONF_BOOST_DURATION = "boost_duration"
+CONF_CONNECT_TIMEOUT = "connect_timeout"
+CONF_READ_TIMEOUT = "read_timeout"
+CONF_FAILURE_THRESHOLD = "failure_threshold"
+CONF_RESET_TIMEOUT = "reset_timeout"
+CONF_PUSH = "push"
+CONF_STREAM_PORT = "stream_port"
+CONF_SEGMENTS = "segments"
+CONF_TRACE_SIZE = "trace_size"
+CONF_RATE_LIMIT = "rate_limit"
+CONF_MAX_STATE_AGE = "max_state_age"
+
+# milliseconds to collect commands before posting them as one request
+DEFAULT_COMMAND_DELAY = 50
+DEFAULT_OPTIMISTIC = False
+# seconds to poll at after commands or external changes
+DEFAULT_MIN_SCAN_INTERVAL = 10
+# seconds to keep polling at the minimum interval
+DEFAULT_BOOST_DURATION = 60
+# seconds to wait for connecting to and reading from a controller
+DEFAULT_CONNECT_TIMEOUT = 5
+DEFAULT_READ_TIMEOUT = 10
+# connections kept open to a controller, and seconds to keep them alive
+DEFAULT_MAX_CONNECTIONS = 2
+DEFAULT_KEEPALIVE_TIMEOUT = 60
+# seconds to cache the DNS resolution of a controller
+DEFAULT_DNS_CACHE_TTL = 300
+# failed requests after which requests to a controller fail fast
+DEFAULT_FAILURE_THRESHOLD = 3
+# seconds to fail fast before probing a controller again
+DEFAULT_RESET_TIMEOUT = 60
+DEFAULT_PUSH = False
+# seconds without an event or heartbeat after which the event stream reconnects
+DEFAULT_STREAM_IDLE_TIMEOUT = 90
+# seconds to wait before reconnecting the event stream, doubled on each failure
+DEFAULT_RECONNECT_DELAY = 1
+DEFAULT_MAX_RECONNECT_DELAY = 300
+# UDP port of the controller's realtime stream
+DEFAULT_STREAM_PORT = 5700
+# number of segments exposed as separate lights, 0 for none
+DEFAULT_SEGMENTS = 0
+# requests per second sent to a LED-Pi, 0 to disable rate limiting
+DEFAULT_RATE_LIMIT = 10
+# requests which may be sent at once after an idle period
+DEFAULT_RATE_BURST = 5
+# requests waiting for the rate limit after which frames and polls are dropped
+DEFAULT_RATE_QUEUE_SIZE = 8
+# seconds the confirmed state is trusted to skip unchanged commands, 0 to disable
+DEFAULT_MAX_STATE_AGE = 60
+# retries of a failed state update, posting the whole state is idempotent
+DEFAULT_MAX_RETRIES = 3
+# seconds before the first retry, doubled for every further retry
+DEFAULT_RETRY_DELAY = 0.5
+# number of recent requests kept in the trace, 0 to disable tracing
+DEFAULT_TRACE_SIZE = 0
+# minimum seconds between two frames of a transition
+DEFAULT_FRAME_INTERVAL = 0.05
+# maximum number of devices sent a state at once by a service
+DEFAULT_MAX_CONCURRENT_COMMANDS = 10
+# seconds before repeated errors of a LED-Pi are logged again
+DEFAULT_ERROR_LOG_INTERVAL = 300
+# maximum number of devices polled at once
+DEFAULT_MAX_CONCURRENT_POLLS = 4
+# maximum seconds added to the poll interval to spread out devices
+DEFAULT_POLL_JITTER = 5
+
+DEFAULT_OPTIONS = {
+    CONF_COMMAND_DELAY: DEFAULT_COMMAND_DELAY,
+    CONF_OPTIMISTIC: DEFAULT_OPTIMISTIC,
+    CONF_MIN_SCAN_INTERVAL: DEFAULT_MIN_SCAN_INTERVAL,
+    CONF_BOOST_DURATION: DEFAULT_BOOST_DURATION,
+    CONF_CONNECT_TIMEOUT: DEFAULT_CONNECT_TIMEOUT,
+    CONF_READ_TIMEOUT: DEFAULT_READ_TIMEOUT,
+    CONF_FAILURE_THRESHOLD: DEFAULT_FAILURE_THRESHOLD,
+    CONF_RESET_TIMEOUT: DEFAULT_RESET_TIMEOUT,
+    CONF_PUSH: DEFAULT_PUSH,
+    CONF_STREAM_PORT: DEFAULT_STREAM_PORT,
+    CONF_SEGMENTS: DEFAULT_SEGMENTS,
+    CONF_TRACE_SIZE: DEFAULT_TRACE_SIZE,
+    CONF_RATE_LIMIT: DEFAULT_RATE_LIMIT,
+    CONF_MAX_STATE_AGE: DEFAULT_MAX_STATE_AGE,
+}
+
+# number of distinct HEX colors to cache conversions for
+COLOR_CACHE_SIZE = 256
 
 ATTR_LEDS = "leds"
-ATTR_STATE = "leds"
+ATTR_PIXELS = "pixels"
+ATTR_STATE = "state"
 
 SERVICE_SET_RGB_COLOR = "rgb_color"
 SERVICE_SET_BRIGHTNESS = "brightness"
+SERVICE_STREAM = "stream"
+SERVICE_STOP_STREAM = "stop_stream"
+SERVICE_DUMP_TRACE = "dump_trace"
+SERVICE_PROFILE = "profile"
+SERVICE_BROADCAST = "broadcast"
+SERVICE_SNAPSHOT = "snapshot"
+SERVICE_RESTORE = "restore"
+
+EVENT_TRACE = f"{DOMAIN}_trace"
+EVENT_BROADCAST = f"{DOMAIN}_broadcast"
+
+ATTR_DURATION = "duration"
+ATTR_PERSIST = "persist"
+ATTR_FORCE = "force"
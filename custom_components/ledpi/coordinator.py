@@ -0,0 +1,99 @@
+"""Update coordinator for the LED-Pi integration."""
+from datetime import timedelta
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.debounce import Debouncer
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+from time import monotonic
+
+from .api import API
+from .scheduler import PollScheduler
+from .trace import TRIGGER
+
+
+class LedPiCoordinator(DataUpdateCoordinator):
+    """Coordinator polling a LED-Pi with an adaptive interval.
+
+    The coordinator polls at the minimum interval for the boost duration after a
+    command or a detected external change, and doubles the interval up to the
+    maximum interval while the state is stable or the host is unreachable. A
+    per-device jitter is added to every interval.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        logger,
+        api: API,
+        name: str,
+        min_interval: timedelta,
+        max_interval: timedelta,
+        boost_duration: timedelta,
+        request_refresh_debouncer: Debouncer = None,
+        scheduler: PollScheduler = None,
+        jitter: timedelta = timedelta(),
+    ):
+        """Initialize the coordinator."""
+        super().__init__(
+            hass,
+            logger,
+            name=name,
+            update_method=api.update,
+            update_interval=min_interval + jitter,
+            request_refresh_debouncer=request_refresh_debouncer,
+        )
+        self.api = api
+        self.min_interval = min(min_interval, max_interval)
+        self.max_interval = max_interval
+        self.boost_duration = boost_duration
+        self.scheduler = scheduler
+        self.jitter = jitter
+        self.polling = True
+        self._boost_until = 0
+
+    @callback
+    def async_set_polling(self, enabled: bool):
+        """Enable or disable polling, e.g. while state changes are pushed."""
+        self.polling = enabled
+        if enabled:
+            self.async_boost()
+        else:
+            self.update_interval = None
+            if self._unsub_refresh:
+                self._unsub_refresh()
+                self._unsub_refresh = None
+
+    @callback
+    def async_boost(self):
+        """Poll at the minimum interval for the boost duration."""
+        if not self.polling:
+            return
+        self._boost_until = monotonic() + self.boost_duration.total_seconds()
+        self.update_interval = self.min_interval + self.jitter
+        if self._listeners:
+            self._schedule_refresh()
+
+    async def _async_update_data(self):
+        """Fetch the latest data and adapt the polling interval."""
+        token = TRIGGER.set(TRIGGER.get() or "poll")
+        try:
+            if self.scheduler is not None:
+                await self.scheduler.async_poll(self.name, super()._async_update_data)
+            else:
+                await super()._async_update_data()
+        finally:
+            TRIGGER.reset(token)
+        data = self.api.data
+
+        if data and self.api.changed:
+            self.logger.debug("Detected state change for %s", self.name)
+            self._boost_until = monotonic() + self.boost_duration.total_seconds()
+
+        if not self.polling:
+            return data
+        if monotonic() < self._boost_until:
+            interval = self.min_interval
+        else:
+            interval = min((self.update_interval - self.jitter) * 2, self.max_interval)
+        self.update_interval = interval + self.jitter
+
+        return data
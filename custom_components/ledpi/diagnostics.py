@@ -0,0 +1,22 @@
+"""Diagnostics for the LED-Pi integration."""
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN, LEDPI_API, LEDPI_COORDINATOR
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry):
+    """Get the state, request metrics and histograms of a config entry."""
+    data = hass.data[DOMAIN][entry.entry_id]
+    api = data[LEDPI_API]
+    coordinator = data[LEDPI_COORDINATOR]
+    interval = coordinator.update_interval
+    return {
+        "options": dict(entry.options),
+        "state": dict(api.data),
+        "available": api.available,
+        "circuit_breaker": api.breaker.state,
+        "polling": coordinator.polling,
+        "update_interval": interval.total_seconds() if interval else None,
+        "metrics": api.metrics.as_dict(),
+    }
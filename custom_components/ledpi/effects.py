@@ -0,0 +1,146 @@
+"""Built-in effects for the LED-Pi integration."""
+import asyncio
+import itertools
+import logging
+import math
+import random
+import time
+import webcolors
+from functools import lru_cache
+from homeassistant.components.light import ATTR_RGB_COLOR, ATTR_BRIGHTNESS
+from homeassistant.util import color as color_util
+
+from .const import ATTR_PIXELS, DEFAULT_FRAME_INTERVAL
+
+_LOGGER = logging.getLogger(__name__)
+
+EFFECT_RAINBOW = "rainbow"
+EFFECT_CHASE = "chase"
+EFFECT_BREATHE = "breathe"
+EFFECT_CANDLE = "candle"
+
+# frames of a full rainbow or breathe cycle
+EFFECT_STEPS = 120
+
+CANDLE_COLOR = (255, 147, 41)
+
+
+@lru_cache(maxsize=1)
+def _rainbow_table():
+    """Precompute the frames of a rainbow cycle."""
+    return tuple(
+        {
+            ATTR_RGB_COLOR: webcolors.rgb_to_hex(
+                color_util.color_hs_to_RGB(360 * i / EFFECT_STEPS, 100)
+            )
+        }
+        for i in range(EFFECT_STEPS)
+    )
+
+
+@lru_cache(maxsize=1)
+def _breathe_table():
+    """Precompute the frames of a breathe cycle."""
+    return tuple(
+        {
+            ATTR_BRIGHTNESS: 0.1
+            + 0.9 * (0.5 - 0.5 * math.cos(2 * math.pi * i / EFFECT_STEPS))
+        }
+        for i in range(EFFECT_STEPS)
+    )
+
+
+def rainbow(leds, rgb_color):
+    """Cycle through the hues."""
+    return itertools.cycle(_rainbow_table())
+
+
+def breathe(leds, rgb_color):
+    """Fade the brightness in and out."""
+    return itertools.chain(
+        [{**_breathe_table()[0], ATTR_RGB_COLOR: webcolors.rgb_to_hex(rgb_color)}],
+        itertools.cycle(_breathe_table()),
+    )
+
+
+def chase(leds, rgb_color):
+    """Move a block of LEDs in the color along the strip."""
+    if not leds:
+        raise ValueError("The chase effect needs the number of LEDs")
+    size = max(1, leds // 10)
+    pixels = (webcolors.rgb_to_hex(rgb_color)[1:] * size) + ("000000" * (leds - size))
+    for offset in itertools.cycle(range(leds)):
+        split = len(pixels) - offset * 6
+        yield {ATTR_PIXELS: pixels[split:] + pixels[:split]}
+
+
+def candle(leds, rgb_color):
+    """Flicker the brightness like a candle."""
+    rng = random.Random()
+    brightness = 0.8
+    yield {
+        ATTR_RGB_COLOR: webcolors.rgb_to_hex(CANDLE_COLOR),
+        ATTR_BRIGHTNESS: brightness,
+    }
+    while True:
+        brightness += (0.4 + 0.6 * rng.random() - brightness) * 0.5
+        yield {ATTR_BRIGHTNESS: round(brightness, 3)}
+
+
+EFFECTS = {
+    EFFECT_RAINBOW: rainbow,
+    EFFECT_CHASE: chase,
+    EFFECT_BREATHE: breathe,
+    EFFECT_CANDLE: candle,
+}
+
+
+class EffectRunner:
+    """Play the frames of an effect with backpressure.
+
+    Each frame is awaited before the next one is generated, so a slow controller
+    slows the effect down instead of queueing requests.
+    """
+
+    def __init__(self, name: str, frames, frame_interval=DEFAULT_FRAME_INTERVAL):
+        """Initialize the runner."""
+        self.name = name
+        self.frames = frames
+        self.frame_interval = frame_interval
+        self.sent = 0
+        self.cpu_time = 0.0
+        self.latency = 0.0
+
+    @property
+    def cpu_time_per_frame(self):
+        """Get the average CPU seconds spent generating a frame."""
+        return self.cpu_time / self.sent if self.sent else 0.0
+
+    async def run(self, send):
+        """Send the frames with the given coroutine function until cancelled."""
+        loop = asyncio.get_running_loop()
+        try:
+            for frame in self._timed(self.frames):
+                sent_at = loop.time()
+                await send(frame)
+                self.sent += 1
+                self.latency = loop.time() - sent_at
+                await asyncio.sleep(max(self.frame_interval - self.latency, 0))
+        finally:
+            _LOGGER.debug(
+                "Effect %s sent %d frames, %.3f ms CPU per frame",
+                self.name,
+                self.sent,
+                self.cpu_time_per_frame * 1000,
+            )
+
+    def _timed(self, frames):
+        """Yield the frames and sum up the CPU time spent generating them."""
+        frames = iter(frames)
+        while True:
+            start = time.thread_time()
+            frame = next(frames, None)
+            self.cpu_time += time.thread_time() - start
+            if frame is None:
+                return
+            yield frame
@@ -1,5 +1,6 @@
 """The LED-Pi entity."""
 
+from homeassistant.core import callback
 from homeassistant.helpers.update_coordinator import (
     CoordinatorEntity,
     DataUpdateCoordinator,
@@ -12,6 +13,9 @@ from .const import DOMAIN
 class LedPiEntity(CoordinatorEntity):
     """A LED Pi entity."""
 
+    # state fields the entity depends on, None for all of them
+    fields = None
+
     def __init__(
         self, api: API, coordinator: DataUpdateCoordinator, name: str, uuid: str
     ):
@@ -20,6 +24,32 @@ class LedPiEntity(CoordinatorEntity):
         self.api = api
         self._name = name
         self._uuid = uuid
+        self._available = None
+        self._values = None
+
+    @callback
+    def _handle_coordinator_update(self):
+        """Write the state only if its fields or the availability changed."""
+        available = self.available
+        if not self.api.changed and available == self._available:
+            return
+
+        values = self._field_values()
+        if values != self._values or available != self._available:
+            self._available = available
+            self._values = values
+            self.async_write_ha_state()
+
+    @property
+    def available(self):
+        """Return if the entity is available and the state of the LED-Pi known."""
+        return super().available and self.api.available and bool(self.api.data)
+
+    def _field_values(self):
+        """Get the values of the state fields the entity depends on."""
+        if self.fields is None:
+            return dict(self.api.data)
+        return tuple(self.api.data.get(field) for field in self.fields)
 
     @property
     def icon(self):
@@ -6,24 +6,39 @@ from homeassistant.components.light import (
     LightEntity,
     SUPPORT_BRIGHTNESS,
     SUPPORT_COLOR,
+    SUPPORT_EFFECT,
+    SUPPORT_TRANSITION,
     ATTR_BRIGHTNESS,
+    ATTR_EFFECT,
+    ATTR_HS_COLOR,
     ATTR_RGB_COLOR,
+    ATTR_TRANSITION,
 )
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_NAME
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers import entity_platform
 from homeassistant.helpers.typing import DiscoveryInfoType
+from homeassistant.util import color as color_util
 from typing import Optional, Callable
 
 from .const import (
+    ATTR_FORCE,
+    ATTR_LEDS,
+    ATTR_STATE,
+    CONF_SEGMENTS,
+    DEFAULT_OPTIONS,
     DOMAIN,
     LEDPI_API,
     LEDPI_COORDINATOR,
     SERVICE_SET_RGB_COLOR,
     SERVICE_SET_BRIGHTNESS,
+    SERVICE_STREAM,
+    SERVICE_STOP_STREAM,
 )
+from .effects import EFFECTS
 from .ledpi_entity import LedPiEntity
+from .trace import triggered_by
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -37,6 +52,7 @@ async def async_setup_entry(
     """Set up the LED-Pi light platform."""
     name = entry.data[CONF_NAME]
     data = hass.data[DOMAIN][entry.entry_id]
+    segments = {**DEFAULT_OPTIONS, **entry.options}[CONF_SEGMENTS]
 
     lights = [
         LedPi(
@@ -46,8 +62,19 @@ async def async_setup_entry(
             entry.entry_id,
         )
     ]
+    lights += [
+        LedPiSegment(
+            data[LEDPI_API],
+            data[LEDPI_COORDINATOR],
+            name,
+            entry.entry_id,
+            index,
+            segments,
+        )
+        for index in range(segments)
+    ]
     _LOGGER.debug("adding ledpi light entity")
-    async_add_entities(lights, True)
+    async_add_entities(lights, False)
 
     # register services
     _LOGGER.info("registering additional ledpi service")
@@ -57,6 +84,7 @@ async def async_setup_entry(
         SERVICE_SET_RGB_COLOR,
         {
             vol.Required(ATTR_RGB_COLOR): cv.ensure_list,
+            vol.Optional(ATTR_FORCE, default=False): cv.boolean,
         },
         "async_set_rgb_color",
     )
@@ -65,14 +93,31 @@ async def async_setup_entry(
         SERVICE_SET_BRIGHTNESS,
         {
             vol.Required(ATTR_BRIGHTNESS): cv.small_float,
+            vol.Optional(ATTR_FORCE, default=False): cv.boolean,
         },
         "async_set_brightness",
     )
+    _LOGGER.debug("registering stream services")
+    platform.async_register_entity_service(
+        SERVICE_STREAM,
+        {
+            vol.Optional(ATTR_RGB_COLOR): cv.ensure_list,
+            vol.Optional(ATTR_BRIGHTNESS): cv.small_float,
+        },
+        "async_stream",
+    )
+    platform.async_register_entity_service(
+        SERVICE_STOP_STREAM,
+        {},
+        "async_stop_stream",
+    )
 
 
 class LedPi(LedPiEntity, LightEntity):
     """LED-Pi Light."""
 
+    fields = (ATTR_STATE, ATTR_BRIGHTNESS, ATTR_RGB_COLOR)
+
     @property
     def name(self):
         """Return the display name of the light."""
@@ -95,32 +140,176 @@ class LedPi(LedPiEntity, LightEntity):
 
     @property
     def brightness(self):
-        """Return the brightness of the light."""
-        return self.api.brightness()
+        """Return the brightness of the light between 0 and 255."""
+        brightness = self.api.brightness()
+        return round(brightness * 255) if brightness is not None else None
+
+    @property
+    def hs_color(self):
+        """Return the color of the light."""
+        rgb_color = self.api.rgb_color()
+        return color_util.color_RGB_to_hs(*rgb_color) if rgb_color else None
 
     @property
     def supported_features(self):
         """Flag supported features."""
-        return SUPPORT_BRIGHTNESS & SUPPORT_COLOR
+        return SUPPORT_BRIGHTNESS | SUPPORT_COLOR | SUPPORT_EFFECT | SUPPORT_TRANSITION
+
+    @property
+    def effect_list(self):
+        """Return the list of supported effects."""
+        return list(EFFECTS)
 
+    @property
+    def effect(self):
+        """Return the current effect."""
+        return self.api.effect
+
+    @triggered_by
     async def async_turn_on(self, **kwargs):
         """Instruct the light to turn on."""
-        if ATTR_BRIGHTNESS in kwargs:
-            await self.api.set_brightness(float(kwargs.get(ATTR_BRIGHTNESS)))
-        if ATTR_RGB_COLOR in kwargs:
-            await self.api.set_rgb(tuple(kwargs.get(ATTR_RGB_COLOR)))
+        if kwargs.get(ATTR_EFFECT) in EFFECTS:
+            await self.api.start_effect(kwargs[ATTR_EFFECT])
+            await self._async_refresh_state()
+            self.async_write_ha_state()
+            return
+        # Home Assistant uses a brightness between 0 and 255, the LED-Pi 0 to 1
+        brightness = kwargs.get(ATTR_BRIGHTNESS)
+        if brightness is not None:
+            brightness = float(brightness) / 255
+        rgb_color = _rgb_color(kwargs)
+        if kwargs.get(ATTR_TRANSITION):
+            await self.api.transition(
+                float(kwargs[ATTR_TRANSITION]),
+                brightness=brightness,
+                rgb_color=rgb_color,
+            )
+            await self._async_refresh_state()
+            return
+        if brightness is not None:
+            await self.api.set_brightness(brightness)
+        if rgb_color is not None:
+            await self.api.set_rgb(rgb_color)
         await self.api.turn_on()
-        await self.async_update()
+        await self._async_refresh_state()
 
+    @triggered_by
     async def async_turn_off(self, **kwargs):
         """Instruct the light to turn off."""
+        if kwargs.get(ATTR_TRANSITION):
+            await self.api.transition(float(kwargs[ATTR_TRANSITION]), turn_off=True)
+            await self._async_refresh_state()
+            return
         await self.api.turn_off()
-        await self.async_update()
+        await self._async_refresh_state()
+
+    @triggered_by
+    async def async_set_rgb_color(self, rgb_color: list, force=False):
+        await self.api.set_rgb(tuple(rgb_color), True, force=force)
+        await self._async_refresh_state()
+
+    @triggered_by
+    async def async_set_brightness(self, brightness: float, force=False):
+        await self.api.set_brightness(brightness, True, force=force)
+        await self._async_refresh_state()
+
+    @triggered_by
+    async def async_stream(self, rgb_color: list = None, brightness: float = None):
+        await self.api.start_stream()
+        self.api.stream_frame(
+            tuple(rgb_color) if rgb_color is not None else None, brightness
+        )
+
+    @triggered_by
+    async def async_stop_stream(self):
+        await self.api.stop_stream()
+        await self._async_refresh_state()
+
+    async def _async_refresh_state(self):
+        """Refresh the state after a command.
+
+        In optimistic mode the locally applied state is pushed to the coordinator
+        and reconciled by the next scheduled poll instead of fetching it again.
+        """
+        self.coordinator.async_boost()
+        if self.api.optimistic:
+            self.coordinator.async_set_updated_data(self.api.data)
+        else:
+            await self.async_update()
+
+
+class LedPiSegment(LedPi):
+    """Segment of a LED-Pi Light."""
+
+    fields = (ATTR_LEDS,)
+
+    def __init__(self, api, coordinator, name, uuid, index: int, count: int):
+        """Initialize the segment."""
+        super().__init__(api, coordinator, name, uuid)
+        self.index = index
+        self.count = count
+        self._is_on = False
+        self._rgb_color = (255, 255, 255)
+
+    @property
+    def name(self):
+        """Return the display name of the segment."""
+        return f"{self._name} Segment {self.index + 1}"
+
+    @property
+    def unique_id(self):
+        """Return the unique id of the segment."""
+        return f"{self._uuid}/Segment/{self.index}"
+
+    @property
+    def is_on(self):
+        """Return if the segment is on."""
+        return self._is_on
+
+    @property
+    def brightness(self):
+        """Return None as the brightness is set for the whole light."""
+        return None
+
+    @property
+    def hs_color(self):
+        """Return the color of the segment."""
+        return color_util.color_RGB_to_hs(*self._rgb_color)
+
+    @property
+    def supported_features(self):
+        """Flag supported features."""
+        return SUPPORT_COLOR
+
+    @triggered_by
+    async def async_turn_on(self, **kwargs):
+        """Instruct the segment to turn on."""
+        self._rgb_color = _rgb_color(kwargs) or self._rgb_color
+        self._is_on = True
+        await self.api.set_segment(
+            self.index, self.count, self._rgb_color, force=kwargs.get(ATTR_FORCE, False)
+        )
+        self.async_write_ha_state()
+
+    @triggered_by
+    async def async_turn_off(self, **kwargs):
+        """Instruct the segment to turn off."""
+        self._is_on = False
+        await self.api.set_segment(self.index, self.count)
+        self.async_write_ha_state()
+
+    @triggered_by
+    async def async_set_rgb_color(self, rgb_color: list, force=False):
+        await self.async_turn_on(rgb_color=rgb_color, force=force)
+
 
-    async def async_set_rgb_color(self, rgb_color: list):
-        await self.api.set_rgb(tuple(rgb_color), True)
-        await self.async_update()
+def _rgb_color(kwargs):
+    """Get the requested color as RGB tuple, None if no color was requested.
 
-    async def async_set_brightness(self, brightness: float):
-        await self.api.set_brightness(brightness, True)
-        await self.async_update()
+    Home Assistant passes the color as HS color to lights without color modes.
+    """
+    if ATTR_RGB_COLOR in kwargs:
+        return tuple(kwargs[ATTR_RGB_COLOR])
+    if ATTR_HS_COLOR in kwargs:
+        return color_util.color_hs_to_RGB(*kwargs[ATTR_HS_COLOR])
+    return None
@@ -0,0 +1,107 @@
+"""Request metrics for the LED-Pi integration."""
+import asyncio
+from bisect import bisect_left
+
+METHOD_GET = "GET"
+METHOD_POST = "POST"
+
+# upper bounds in seconds of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class LatencyHistogram:
+    """Histogram of request latencies with fixed buckets.
+
+    Percentiles are the upper bound of the bucket containing them, so recording
+    a request costs a bisect instead of keeping every sample.
+    """
+
+    __slots__ = ("counts", "count", "total")
+
+    def __init__(self):
+        """Initialize an empty histogram."""
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def record(self, seconds: float):
+        """Record a latency."""
+        self.counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+
+    def percentile(self, percentile: float):
+        """Get the latency below which the percentile of requests completed.
+
+        Returns None without requests and infinity if the percentile exceeds the
+        largest bucket.
+        """
+        if not self.count:
+            return None
+        rank = percentile / 100 * self.count
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS, self.counts):
+            cumulative += count
+            if cumulative >= rank:
+                return bound
+        return float("inf")
+
+    def as_dict(self):
+        """Get the histogram with its percentiles."""
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else None,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "buckets": {
+                **{
+                    str(bound): count
+                    for bound, count in zip(LATENCY_BUCKETS, self.counts)
+                },
+                "inf": self.counts[-1],
+            },
+        }
+
+
+class Metrics:
+    """Counters and latency histograms of the requests to a LED-Pi."""
+
+    def __init__(self):
+        """Initialize the metrics."""
+        self.latency = {METHOD_GET: LatencyHistogram(), METHOD_POST: LatencyHistogram()}
+        self.errors = 0
+        self.timeouts = 0
+        self.retries = 0
+        self.skipped = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.last_poll = None
+
+    def record_request(self, method: str, seconds: float, sent=0, received=0):
+        """Record a completed request."""
+        self.latency[method].record(seconds)
+        self.bytes_sent += sent
+        self.bytes_received += received
+
+    def record_error(self, err):
+        """Record a failed request."""
+        self.errors += 1
+        if isinstance(err, asyncio.TimeoutError):
+            self.timeouts += 1
+
+    def as_dict(self):
+        """Get all metrics."""
+        return {
+            "latency": {
+                method: histogram.as_dict()
+                for method, histogram in self.latency.items()
+            },
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "retries": self.retries,
+            "skipped": self.skipped,
+            "bytes_sent": self.bytes_sent,
+            "bytes_received": self.bytes_received,
+            "last_poll": self.last_poll.isoformat() if self.last_poll else None,
+        }
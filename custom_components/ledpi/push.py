@@ -0,0 +1,69 @@
+"""Push-based state updates for the LED-Pi integration."""
+import asyncio
+import logging
+from homeassistant.core import callback
+
+from .api import API
+from .const import DEFAULT_MAX_RECONNECT_DELAY, DEFAULT_RECONNECT_DELAY
+from .coordinator import LedPiCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class EventStream:
+    """Listener feeding the states pushed by a LED-Pi into its coordinator.
+
+    Polling is suspended while the stream is connected. If the stream drops,
+    the coordinator polls again until the stream has been reconnected.
+    """
+
+    def __init__(
+        self,
+        api: API,
+        coordinator: LedPiCoordinator,
+        reconnect_delay=DEFAULT_RECONNECT_DELAY,
+        max_reconnect_delay=DEFAULT_MAX_RECONNECT_DELAY,
+    ):
+        """Initialize the event stream."""
+        self.api = api
+        self.coordinator = coordinator
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.connected = False
+        self._task = None
+
+    @callback
+    def start(self):
+        """Start listening for events."""
+        self._task = asyncio.ensure_future(self._run())
+
+    @callback
+    def stop(self):
+        """Stop listening for events."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        """Listen for events and reconnect with an increasing delay."""
+        delay = self.reconnect_delay
+        while True:
+            try:
+                async for data in self.api.events():
+                    if not self.connected:
+                        _LOGGER.debug("Connected to events of %s", self.api.host)
+                        self.connected = True
+                        delay = self.reconnect_delay
+                        self.coordinator.async_set_polling(False)
+                    await self.api.update(data)
+                    self.coordinator.async_set_updated_data(self.api.data)
+            except asyncio.CancelledError:
+                raise
+            except Exception as err:  # pylint: disable=broad-except
+                _LOGGER.debug("Lost events of %s: %s", self.api.host, err)
+
+            if self.connected:
+                self.connected = False
+                self.coordinator.async_set_polling(True)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
@@ -0,0 +1,95 @@
+"""Rate limiting for the LED-Pi integration."""
+import asyncio
+import heapq
+import itertools
+
+from .const import DEFAULT_RATE_BURST, DEFAULT_RATE_QUEUE_SIZE
+
+# priorities of the requests, lower values are sent first
+PRIORITY_SAFETY = 0
+PRIORITY_USER = 1
+PRIORITY_FRAME = 2
+PRIORITY_POLL = 3
+
+
+class RateLimiter:
+    """Token bucket limiting the requests to a LED-Pi.
+
+    Requests which cannot be sent right away wait in a priority queue. If the
+    queue is full, frames and polls are dropped in favor of more important
+    requests, while commands are always queued.
+    """
+
+    def __init__(
+        self, rate: float, burst=DEFAULT_RATE_BURST, max_queue=DEFAULT_RATE_QUEUE_SIZE
+    ):
+        """Initialize the rate limiter with the requests per second."""
+        self.rate = rate
+        self.burst = burst
+        self.max_queue = max_queue
+        self.dropped = 0
+        self._tokens = float(burst)
+        self._updated = None
+        self._waiters = []
+        self._sequence = itertools.count()
+        self._timer = None
+
+    async def acquire(self, priority: int):
+        """Wait until the request may be sent, or return False if it was dropped."""
+        self._refill()
+        if not self._waiters and self._tokens >= 1:
+            self._tokens -= 1
+            return True
+
+        if len(self._waiters) >= self.max_queue:
+            lowest = max(self._waiters)
+            if lowest[0] > priority and lowest[0] >= PRIORITY_FRAME:
+                self._waiters.remove(lowest)
+                heapq.heapify(self._waiters)
+                lowest[2].set_result(False)
+                self.dropped += 1
+            elif priority >= PRIORITY_FRAME:
+                self.dropped += 1
+                return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), waiter))
+        self._schedule()
+        try:
+            return await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled() and waiter.result():
+                # the token was handed out, but will not be used
+                self._tokens += 1
+            else:
+                self._waiters = [
+                    entry for entry in self._waiters if entry[2] is not waiter
+                ]
+                heapq.heapify(self._waiters)
+            raise
+
+    def _refill(self):
+        """Add the tokens accrued since the last refill."""
+        now = asyncio.get_running_loop().time()
+        if self._updated is not None:
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._updated) * self.rate
+            )
+        self._updated = now
+
+    def _schedule(self):
+        """Release the next waiter once a token is available."""
+        if self._timer is None and self._waiters:
+            self._timer = asyncio.get_running_loop().call_later(
+                max(0, (1 - self._tokens) / self.rate), self._release
+            )
+
+    def _release(self):
+        """Hand out the available tokens to the most important waiters."""
+        self._timer = None
+        self._refill()
+        while self._waiters and self._tokens >= 1:
+            _, _, waiter = heapq.heappop(self._waiters)
+            self._tokens -= 1
+            waiter.set_result(True)
+        self._schedule()
@@ -0,0 +1,75 @@
+"""Realtime UDP color streaming for the LED-Pi integration."""
+import asyncio
+import logging
+import struct
+
+_LOGGER = logging.getLogger(__name__)
+
+FRAME_MAGIC = b"LP"
+FRAME_VERSION = 1
+FLAG_PIXELS = 0x01
+
+# magic, version, flags, sequence number and brightness (0-255)
+FRAME_HEADER = struct.Struct("!2sBBIB")
+
+# bytes queued in the transport after which frames are dropped
+MAX_WRITE_BUFFER_SIZE = 64 * 1024
+
+
+def encode_frame(sequence: int, brightness: float, colors: bytes, pixels=False):
+    """Encode a frame.
+
+    The colors are either a single RGB triple for the whole strip or one RGB
+    triple per LED. Receivers drop frames with an older sequence number than the
+    last frame they applied.
+    """
+    return (
+        FRAME_HEADER.pack(
+            FRAME_MAGIC,
+            FRAME_VERSION,
+            FLAG_PIXELS if pixels else 0,
+            sequence,
+            max(0, min(255, round(brightness * 255))),
+        )
+        + colors
+    )
+
+
+class RealtimeStream(asyncio.DatagramProtocol):
+    """Fire-and-forget UDP stream of color frames to a LED-Pi."""
+
+    def __init__(self):
+        """Initialize the stream."""
+        self.transport = None
+        self.sequence = 0
+        self.sent = 0
+        self.dropped = 0
+
+    def connection_made(self, transport):
+        """Store the transport once the endpoint is ready."""
+        self.transport = transport
+
+    def connection_lost(self, exc):
+        """Forget the transport once the endpoint is closed."""
+        self.transport = None
+
+    def error_received(self, exc):
+        """Log errors, e.g. ICMP port unreachable, without stopping the stream."""
+        _LOGGER.debug("Error while streaming: %s", exc)
+
+    def send(self, brightness: float, colors: bytes, pixels=False):
+        """Send a frame, or drop it if the transport cannot keep up."""
+        if self.transport is None:
+            return False
+        if self.transport.get_write_buffer_size() > MAX_WRITE_BUFFER_SIZE:
+            self.dropped += 1
+            return False
+        self.sequence = (self.sequence + 1) & 0xFFFFFFFF
+        self.transport.sendto(encode_frame(self.sequence, brightness, colors, pixels))
+        self.sent += 1
+        return True
+
+    def close(self):
+        """Close the stream."""
+        if self.transport is not None:
+            self.transport.close()
@@ -0,0 +1,50 @@
+"""Fleet-wide poll scheduler for the LED-Pi integration."""
+import asyncio
+import logging
+import zlib
+from datetime import timedelta
+from time import monotonic
+
+from .const import DEFAULT_MAX_CONCURRENT_POLLS, DEFAULT_POLL_JITTER
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class PollScheduler:
+    """Scheduler shared by all LED-Pi devices.
+
+    It limits how many polls run at once and spreads the polls of different
+    devices with a deterministic jitter.
+    """
+
+    def __init__(
+        self,
+        max_concurrent=DEFAULT_MAX_CONCURRENT_POLLS,
+        max_jitter=DEFAULT_POLL_JITTER,
+    ):
+        """Initialize the scheduler."""
+        self.max_jitter = max_jitter
+        self.durations = {}
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+
+    def jitter(self, key: str) -> timedelta:
+        """Get the deterministic jitter for a device."""
+        fraction = zlib.crc32(key.encode()) / 0xFFFFFFFF
+        return timedelta(seconds=round(fraction * self.max_jitter, 3))
+
+    async def async_poll(self, name: str, update_method):
+        """Run a poll once a slot is free and record its duration."""
+        queued = monotonic()
+        async with self._semaphore:
+            started = monotonic()
+            try:
+                return await update_method()
+            finally:
+                finished = monotonic()
+                self.durations[name] = finished - queued
+                _LOGGER.debug(
+                    "Polled %s in %.3f seconds after waiting %.3f seconds",
+                    name,
+                    finished - started,
+                    started - queued,
+                )
@@ -1,13 +1,20 @@
 """Sensors for the LED-Pi LED-Pi integration."""
 import logging
+from homeassistant.components.light import ATTR_BRIGHTNESS, ATTR_RGB_COLOR
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import CONF_NAME, PERCENTAGE
-from homeassistant.core import HomeAssistant
+from homeassistant.const import (
+    CONF_NAME,
+    DEVICE_CLASS_TIMESTAMP,
+    PERCENTAGE,
+    TIME_MILLISECONDS,
+)
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.typing import DiscoveryInfoType
 from typing import Optional, Callable
 
-from .const import DOMAIN, LEDPI_API, LEDPI_COORDINATOR
+from .const import ATTR_LEDS, DOMAIN, LEDPI_API, LEDPI_COORDINATOR
 from .ledpi_entity import LedPiEntity
+from .metrics import METHOD_GET, METHOD_POST
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -31,14 +38,28 @@ async def async_setup_entry(
         LedPiBrightnessSensor(
             data[LEDPI_API], data[LEDPI_COORDINATOR], name, entry.entry_id
         ),
+        LedPiLatencySensor(
+            data[LEDPI_API], data[LEDPI_COORDINATOR], name, entry.entry_id, METHOD_GET
+        ),
+        LedPiLatencySensor(
+            data[LEDPI_API], data[LEDPI_COORDINATOR], name, entry.entry_id, METHOD_POST
+        ),
+        LedPiErrorsSensor(
+            data[LEDPI_API], data[LEDPI_COORDINATOR], name, entry.entry_id
+        ),
+        LedPiLastPollSensor(
+            data[LEDPI_API], data[LEDPI_COORDINATOR], name, entry.entry_id
+        ),
     ]
     _LOGGER.debug("adding ledpi sensor entities")
-    async_add_entities(sensors, True)
+    async_add_entities(sensors, False)
 
 
 class LedPiRGBSensor(LedPiEntity):
     """LED-Pi Color Sensor."""
 
+    fields = (ATTR_RGB_COLOR,)
+
     @property
     def name(self):
         """Return the name of the sensor."""
@@ -63,6 +84,8 @@ class LedPiRGBSensor(LedPiEntity):
 class LedPiRGBNameSensor(LedPiEntity):
     """LED-Pi Color Sensor."""
 
+    fields = (ATTR_RGB_COLOR,)
+
     @property
     def name(self):
         """Return the name of the sensor."""
@@ -87,6 +110,8 @@ class LedPiRGBNameSensor(LedPiEntity):
 class LedPiLEDsSensor(LedPiEntity):
     """LED-Pi Number of LEDs Sensor."""
 
+    fields = (ATTR_LEDS,)
+
     @property
     def name(self):
         """Return the name of the sensor."""
@@ -111,6 +136,8 @@ class LedPiLEDsSensor(LedPiEntity):
 class LedPiBrightnessSensor(LedPiEntity):
     """LED-Pi Brightness Sensor."""
 
+    fields = (ATTR_BRIGHTNESS,)
+
     @property
     def name(self):
         """Return the name of the sensor."""
@@ -135,3 +162,148 @@ class LedPiBrightnessSensor(LedPiEntity):
     def state(self):
         """Return the current value."""
         return self.api.brightness()
+
+
+class LedPiDiagnosticSensor(LedPiEntity):
+    """Base of the LED-Pi diagnostic sensors, disabled by default.
+
+    They stay available while the LED-Pi is unreachable to show its errors.
+    """
+
+    @property
+    def entity_registry_enabled_default(self):
+        """Return if the entity should be enabled when first added."""
+        return False
+
+    @property
+    def available(self):
+        """Return True as the metrics are always known."""
+        return True
+
+    @callback
+    def _handle_coordinator_update(self):
+        """Write the state only if the metric changed."""
+        values = self._field_values()
+        if values != self._values:
+            self._values = values
+            self.async_write_ha_state()
+
+    def _field_values(self):
+        """Get the metric values the sensor shows."""
+        return self.state, self.extra_state_attributes
+
+    @property
+    def icon(self):
+        """Icon to use in the frontend, if any."""
+        return "mdi:chart-bell-curve"
+
+
+class LedPiLatencySensor(LedPiDiagnosticSensor):
+    """LED-Pi Request Latency Sensor."""
+
+    def __init__(self, api, coordinator, name, uuid, method: str):
+        """Initialize the sensor for the requests with the method."""
+        super().__init__(api, coordinator, name, uuid)
+        self.method = method
+
+    @property
+    def name(self):
+        """Return the name of the sensor."""
+        return f"{self._name} {self.method} Latency"
+
+    @property
+    def unique_id(self):
+        """Return the unique id of the sensor."""
+        return f"{self._uuid}/{self.method} Latency"
+
+    @property
+    def unit_of_measurement(self):
+        """Return the unit of measurement."""
+        return TIME_MILLISECONDS
+
+    @property
+    def state(self):
+        """Return the 95th percentile of the latency."""
+        return _to_milliseconds(self.api.metrics.latency[self.method].percentile(95))
+
+    @property
+    def extra_state_attributes(self):
+        """Return the other percentiles and the number of requests."""
+        histogram = self.api.metrics.latency[self.method]
+        return {
+            "p50": _to_milliseconds(histogram.percentile(50)),
+            "p99": _to_milliseconds(histogram.percentile(99)),
+            "requests": histogram.count,
+        }
+
+
+class LedPiErrorsSensor(LedPiDiagnosticSensor):
+    """LED-Pi Request Errors Sensor."""
+
+    @property
+    def name(self):
+        """Return the name of the sensor."""
+        return f"{self._name} Request Errors"
+
+    @property
+    def unique_id(self):
+        """Return the unique id of the sensor."""
+        return f"{self._uuid}/Request Errors"
+
+    @property
+    def icon(self):
+        """Icon to use in the frontend, if any."""
+        return "mdi:alert-circle-outline"
+
+    @property
+    def state(self):
+        """Return the number of failed requests."""
+        return self.api.metrics.errors
+
+    @property
+    def extra_state_attributes(self):
+        """Return the number of timeouts and retries."""
+        return {
+            "timeouts": self.api.metrics.timeouts,
+            "retries": self.api.metrics.retries,
+        }
+
+
+class LedPiLastPollSensor(LedPiDiagnosticSensor):
+    """LED-Pi Last Successful Poll Sensor."""
+
+    @property
+    def name(self):
+        """Return the name of the sensor."""
+        return f"{self._name} Last Poll"
+
+    @property
+    def unique_id(self):
+        """Return the unique id of the sensor."""
+        return f"{self._uuid}/Last Poll"
+
+    @property
+    def icon(self):
+        """Icon to use in the frontend, if any."""
+        return "mdi:clock-check-outline"
+
+    @property
+    def device_class(self):
+        """Return the device class of the sensor."""
+        return DEVICE_CLASS_TIMESTAMP
+
+    @property
+    def state(self):
+        """Return the time of the last successful poll."""
+        last_poll = self.api.metrics.last_poll
+        return last_poll.isoformat() if last_poll else None
+
+    @property
+    def extra_state_attributes(self):
+        """Return no attributes."""
+        return None
+
+
+def _to_milliseconds(seconds):
+    """Convert a latency to milliseconds, keeping None and infinity."""
+    return seconds * 1000 if seconds is not None else None
@@ -0,0 +1,230 @@
+"""Services for the LED-Pi integration."""
+import asyncio
+import homeassistant.helpers.config_validation as cv
+import logging
+import voluptuous as vol
+import webcolors
+from homeassistant.components.light import ATTR_BRIGHTNESS, ATTR_RGB_COLOR
+from homeassistant.const import (
+    ATTR_ENTITY_ID,
+    CONF_NAME,
+    CONF_STATE,
+    STATE_OFF,
+    STATE_ON,
+)
+from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.helpers import entity_registry
+from homeassistant.helpers.storage import Store
+
+from .const import (
+    ATTR_DURATION,
+    ATTR_FORCE,
+    ATTR_PERSIST,
+    ATTR_STATE,
+    DEFAULT_MAX_CONCURRENT_COMMANDS,
+    DOMAIN,
+    EVENT_BROADCAST,
+    EVENT_TRACE,
+    LEDPI_API,
+    LEDPI_COORDINATOR,
+    LEDPI_SCHEDULER,
+    SERVICE_BROADCAST,
+    SERVICE_DUMP_TRACE,
+    SERVICE_PROFILE,
+    SERVICE_RESTORE,
+    SERVICE_SNAPSHOT,
+    SNAPSHOTS_STORAGE_KEY,
+    STORAGE_VERSION,
+)
+from .trace import TRIGGER, Profiler
+
+_LOGGER = logging.getLogger(__name__)
+
+TARGET_SCHEMA = {vol.Optional(ATTR_ENTITY_ID): cv.entity_ids}
+
+BROADCAST_SCHEMA = vol.Schema(
+    {
+        **TARGET_SCHEMA,
+        vol.Optional(CONF_STATE): vol.In((STATE_ON, STATE_OFF)),
+        vol.Optional(ATTR_BRIGHTNESS): cv.small_float,
+        vol.Optional(ATTR_RGB_COLOR): vol.All(
+            vol.ExactSequence((cv.byte, cv.byte, cv.byte)), vol.Coerce(tuple)
+        ),
+        vol.Optional(ATTR_FORCE, default=False): cv.boolean,
+    }
+)
+
+SNAPSHOT_SCHEMA = vol.Schema(
+    {
+        **TARGET_SCHEMA,
+        vol.Optional(CONF_NAME, default="default"): cv.string,
+        vol.Optional(ATTR_PERSIST, default=False): cv.boolean,
+    }
+)
+
+RESTORE_SCHEMA = vol.Schema(
+    {
+        **TARGET_SCHEMA,
+        vol.Optional(CONF_NAME, default="default"): cv.string,
+        vol.Optional(ATTR_FORCE, default=False): cv.boolean,
+    }
+)
+
+# fields of a snapshot posted on restore
+RESTORED_FIELDS = (ATTR_STATE, ATTR_BRIGHTNESS, ATTR_RGB_COLOR)
+
+PROFILE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_DURATION, default=60): vol.All(
+            vol.Coerce(float), vol.Range(min=1)
+        )
+    }
+)
+
+
+def async_setup_services(hass: HomeAssistant):
+    """Register the services of the integration."""
+
+    async def async_broadcast(call: ServiceCall):
+        """Send one state to all targeted LED-Pis at once."""
+        state = {}
+        if CONF_STATE in call.data:
+            state[ATTR_STATE] = call.data[CONF_STATE]
+        if ATTR_BRIGHTNESS in call.data:
+            state[ATTR_BRIGHTNESS] = call.data[ATTR_BRIGHTNESS]
+        if ATTR_RGB_COLOR in call.data:
+            state[ATTR_RGB_COLOR] = webcolors.rgb_to_hex(call.data[ATTR_RGB_COLOR])
+        token = TRIGGER.set(f"{DOMAIN}.{SERVICE_BROADCAST}")
+        try:
+            results = await async_dispatch(
+                async_get_entries(hass, call.data.get(ATTR_ENTITY_ID)),
+                lambda entry_id, api: api.async_send_state(
+                    state, force=call.data[ATTR_FORCE]
+                ),
+            )
+        finally:
+            TRIGGER.reset(token)
+        hass.bus.async_fire(EVENT_BROADCAST, {"results": results})
+
+    store = Store(hass, STORAGE_VERSION, SNAPSHOTS_STORAGE_KEY)
+    snapshots = {}
+
+    async def async_snapshot(call: ServiceCall):
+        """Store the current state of the targeted LED-Pis."""
+        snapshot = {
+            entry_id: {
+                field: data[LEDPI_API].data[field]
+                for field in RESTORED_FIELDS
+                if field in data[LEDPI_API].data
+            }
+            for entry_id, data in async_get_entries(
+                hass, call.data.get(ATTR_ENTITY_ID)
+            ).items()
+            if data[LEDPI_API].data
+        }
+        snapshots[call.data[CONF_NAME]] = snapshot
+        if call.data[ATTR_PERSIST]:
+            persisted = await store.async_load() or {}
+            persisted[call.data[CONF_NAME]] = snapshot
+            await store.async_save(persisted)
+
+    async def async_restore(call: ServiceCall):
+        """Restore a snapshot with one request per LED-Pi, all at once."""
+        name = call.data[CONF_NAME]
+        if name not in snapshots:
+            persisted = await store.async_load() or {}
+            if name not in persisted:
+                _LOGGER.warning("Unknown snapshot %s", name)
+                return
+            snapshots[name] = persisted[name]
+        snapshot = snapshots[name]
+        entries = async_get_entries(hass, call.data.get(ATTR_ENTITY_ID))
+        token = TRIGGER.set(f"{DOMAIN}.{SERVICE_RESTORE}")
+        try:
+            await async_dispatch(
+                {
+                    entry_id: data
+                    for entry_id, data in entries.items()
+                    if entry_id in snapshot
+                },
+                lambda entry_id, api: api.async_send_state(
+                    dict(snapshot[entry_id]), force=call.data[ATTR_FORCE]
+                ),
+            )
+        finally:
+            TRIGGER.reset(token)
+
+    async def async_dump_trace(call: ServiceCall):
+        """Fire an event with the recorded trace of each LED-Pi."""
+        for entry_id, data in async_get_entries(hass).items():
+            api = data[LEDPI_API]
+            hass.bus.async_fire(
+                EVENT_TRACE,
+                {"entry_id": entry_id, "host": api.host, "trace": api.trace.dump()},
+            )
+
+    profiler = Profiler()
+
+    async def async_profile(call: ServiceCall):
+        """Profile the integration for the given duration."""
+        await profiler.async_profile(hass, call.data[ATTR_DURATION])
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_BROADCAST, async_broadcast, schema=BROADCAST_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_SNAPSHOT, async_snapshot, schema=SNAPSHOT_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_RESTORE, async_restore, schema=RESTORE_SCHEMA
+    )
+    hass.services.async_register(DOMAIN, SERVICE_DUMP_TRACE, async_dump_trace)
+    hass.services.async_register(
+        DOMAIN, SERVICE_PROFILE, async_profile, schema=PROFILE_SCHEMA
+    )
+
+
+def async_get_entries(hass: HomeAssistant, entity_ids=None):
+    """Get the data of the config entries the entities belong to, or all of them."""
+    entries = {
+        entry_id: data
+        for entry_id, data in hass.data[DOMAIN].items()
+        if entry_id != LEDPI_SCHEDULER
+    }
+    if entity_ids is None:
+        return entries
+    registry = entity_registry.async_get(hass)
+    targeted = set()
+    for entity_id in entity_ids:
+        entity = registry.async_get(entity_id)
+        if entity is not None:
+            targeted.add(entity.config_entry_id)
+    return {
+        entry_id: data for entry_id, data in entries.items() if entry_id in targeted
+    }
+
+
+async def async_dispatch(entries: dict, send):
+    """Send to the APIs concurrently, at most DEFAULT_MAX_CONCURRENT_COMMANDS at once.
+
+    The send coroutine function is called with the config entry id and its API.
+
+    Accepted states are passed to the entities without polling the LED-Pis.
+    Returns if each config entry accepted its state.
+    """
+    semaphore = asyncio.Semaphore(DEFAULT_MAX_CONCURRENT_COMMANDS)
+
+    async def async_send(entry_id, data):
+        async with semaphore:
+            accepted = await send(entry_id, data[LEDPI_API])
+        if accepted:
+            data[LEDPI_COORDINATOR].async_set_updated_data(data[LEDPI_API].data)
+        return accepted
+
+    accepted = await asyncio.gather(
+        *(async_send(entry_id, data) for entry_id, data in entries.items())
+    )
+    for data, success in zip(entries.values(), accepted):
+        if not success:
+            _LOGGER.warning("Could not send the state to %s", data[LEDPI_API].host)
+    return dict(zip(entries, accepted))
@@ -0,0 +1,62 @@
+"""State snapshot for the LED-Pi integration."""
+import logging
+import webcolors
+from functools import lru_cache
+from homeassistant.components.light import ATTR_BRIGHTNESS, ATTR_RGB_COLOR
+
+from .colors import css3_index
+from .const import ATTR_LEDS, ATTR_STATE, COLOR_CACHE_SIZE
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class LedPiState:
+    """Immutable snapshot of a LED-Pi state, parsed once per update.
+
+    Fields missing in the state, or colors which cannot be converted, are None.
+    """
+
+    __slots__ = (
+        "is_on",
+        "brightness",
+        "rgb_hex_color",
+        "rgb_color",
+        "rgb_name",
+        "leds",
+    )
+
+    def __init__(self, data: dict):
+        """Initialize the snapshot from the raw state."""
+        rgb_hex_color = data.get(ATTR_RGB_COLOR)
+        init = super().__setattr__
+        init("is_on", data[ATTR_STATE] == "on" if ATTR_STATE in data else None)
+        init("brightness", data.get(ATTR_BRIGHTNESS))
+        init("rgb_hex_color", rgb_hex_color)
+        init("rgb_color", hex_to_rgb(rgb_hex_color))
+        init("rgb_name", hex_to_name(rgb_hex_color))
+        init("leds", data.get(ATTR_LEDS))
+
+    def __setattr__(self, name, value):
+        """Prevent modifications of the snapshot."""
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+
+@lru_cache(maxsize=COLOR_CACHE_SIZE)
+def hex_to_rgb(rgb_hex_color):
+    """Convert a HEX color to an RGB tuple, or None if that is not possible."""
+    if rgb_hex_color is None:
+        return None
+    try:
+        return tuple(webcolors.hex_to_rgb(rgb_hex_color))
+    except ValueError as err:
+        _LOGGER.error("Could not convert HEX %s to RGB: %s", rgb_hex_color, err)
+        return None
+
+
+@lru_cache(maxsize=COLOR_CACHE_SIZE)
+def hex_to_name(rgb_hex_color):
+    """Get the name of the nearest CSS3 color, or None for an invalid HEX color."""
+    rgb_color = hex_to_rgb(rgb_hex_color)
+    if rgb_color is None:
+        return None
+    return css3_index().nearest(rgb_color)
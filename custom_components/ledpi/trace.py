@@ -0,0 +1,113 @@
+"""Request tracing and profiling for the LED-Pi integration."""
+import asyncio
+import cProfile
+import functools
+import io
+import logging
+import pstats
+import time
+from collections import deque
+from contextvars import ContextVar
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+# entity method or service which triggered the current operation
+TRIGGER = ContextVar(f"{DOMAIN}_trigger", default=None)
+
+# number of functions listed in the profile summary
+PROFILE_STATS_LIMIT = 30
+
+
+def triggered_by(method):
+    """Record the decorated entity method as trigger of its operations."""
+
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        token = TRIGGER.set(f"{self.entity_id}.{method.__name__}")
+        try:
+            return await method(self, *args, **kwargs)
+        finally:
+            TRIGGER.reset(token)
+
+    return wrapper
+
+
+class Trace:
+    """Ring buffer of the most recent operations of an API.
+
+    With a size of 0 nothing is recorded, so tracing can stay installed.
+    """
+
+    def __init__(self, size: int = 0):
+        """Initialize the trace."""
+        self.entries = deque(maxlen=size) if size else None
+
+    @property
+    def enabled(self):
+        """Check if operations are recorded."""
+        return self.entries is not None
+
+    def record(
+        self, method: str, size: int, queue_wait=0.0, network=0.0, parse=0.0, error=None
+    ):
+        """Record an operation with its durations in seconds."""
+        if self.entries is None:
+            return
+        self.entries.append(
+            {
+                "time": time.time(),
+                "method": method,
+                "bytes": size,
+                "queue_wait_ms": round(queue_wait * 1000, 3),
+                "network_ms": round(network * 1000, 3),
+                "parse_ms": round(parse * 1000, 3),
+                "trigger": TRIGGER.get(),
+                "error": error,
+            }
+        )
+
+    def dump(self):
+        """Get the recorded operations, oldest first."""
+        return list(self.entries) if self.entries is not None else []
+
+
+class Profiler:
+    """Profile the event loop for a while, one profile at a time."""
+
+    def __init__(self):
+        """Initialize the profiler."""
+        self.running = False
+
+    async def async_profile(self, hass, duration: float):
+        """Profile for the duration, then write the stats to the config directory.
+
+        The summary logged afterwards only lists the integration's functions.
+        """
+        if self.running:
+            _LOGGER.warning("Profiling is already running")
+            return None
+        self.running = True
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            await asyncio.sleep(duration)
+        finally:
+            profiler.disable()
+            self.running = False
+        path = hass.config.path(f"{DOMAIN}.profile.{int(time.time())}.cprof")
+        summary = await hass.async_add_executor_job(_write_profile, profiler, path)
+        _LOGGER.info("Profile written to %s:\n%s", path, summary)
+        return path
+
+
+def _write_profile(profiler, path):
+    """Write the profile and summarize the integration's functions."""
+    profiler.dump_stats(path)
+    stream = io.StringIO()
+    stats = pstats.Stats(profiler, stream=stream)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(
+        rf"custom_components[/\\]{DOMAIN}", PROFILE_STATS_LIMIT
+    )
+    return stream.getvalue()
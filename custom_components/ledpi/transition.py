@@ -0,0 +1,64 @@
+"""Client-side transitions for the LED-Pi integration."""
+import asyncio
+import webcolors
+from homeassistant.components.light import ATTR_RGB_COLOR, ATTR_BRIGHTNESS
+
+from .const import DEFAULT_FRAME_INTERVAL
+
+
+def interpolate(start_brightness, brightness, start_rgb, rgb, steps: int):
+    """Precompute the frames of a transition.
+
+    Frame i holds the state at (i + 1) / steps of the transition, so the last
+    frame is the target. The color is omitted if it does not change.
+    """
+    frames = []
+    for i in range(1, steps + 1):
+        ratio = i / steps
+        frame = {
+            ATTR_BRIGHTNESS: start_brightness + (brightness - start_brightness) * ratio
+        }
+        if start_rgb != rgb:
+            frame[ATTR_RGB_COLOR] = webcolors.rgb_to_hex(
+                tuple(round(a + (b - a) * ratio) for a, b in zip(start_rgb, rgb))
+            )
+        frames.append(frame)
+    return frames
+
+
+class Transition:
+    """Frame scheduler playing a precomputed transition.
+
+    Each frame is awaited before the next one is sent, and the frame to send is
+    picked by the elapsed time. A slow controller therefore gets fewer frames
+    instead of a growing backlog, and the transition still ends on time.
+    """
+
+    def __init__(self, frames, duration: float, frame_interval=DEFAULT_FRAME_INTERVAL):
+        """Initialize the transition."""
+        self.frames = frames
+        self.duration = duration
+        self.frame_interval = frame_interval
+        self.sent = 0
+        self.latency = 0.0
+
+    async def run(self, send):
+        """Send the frames with the given coroutine function."""
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        count = len(self.frames)
+        index = -1
+        while index < count - 1:
+            elapsed = loop.time() - start
+            due = min(count - 1, int(elapsed / self.duration * count))
+            if due > index:
+                index = due
+                sent_at = loop.time()
+                await send(self.frames[index])
+                self.sent += 1
+                self.latency = loop.time() - sent_at
+            if index < count - 1:
+                next_at = start + (index + 1) * self.duration / count
+                await asyncio.sleep(
+                    max(self.frame_interval - self.latency, next_at - loop.time(), 0)
+                )
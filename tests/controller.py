@@ -0,0 +1,73 @@
+"""Local stand-in for the LED-Pi Controller API."""
+
+import asyncio
+import json
+import random
+from aiohttp import web
+from homeassistant.components.light import ATTR_BRIGHTNESS, ATTR_RGB_COLOR
+
+from custom_components.ledpi.const import ATTR_STATE
+
+
+class StandInController:
+    """Serve /api/v1/state and /api/v1/events with a configurable latency."""
+
+    def __init__(self, latency=0.0, jitter=0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.state = {ATTR_STATE: "on", ATTR_BRIGHTNESS: 1.0, ATTR_RGB_COLOR: "#ffffff"}
+        self.requests = []
+        self.host = None
+        self._listeners = set()
+        self._runner = None
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/api/v1/state", self._get_state)
+        app.router.add_post("/api/v1/state", self._post_state)
+        app.router.add_get("/api/v1/events", self._events)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        self.host = f"127.0.0.1:{port}"
+
+    async def stop(self):
+        for listener in self._listeners:
+            listener.put_nowait(None)
+        await self._runner.cleanup()
+
+    def set_state(self, state):
+        self.state = {**self.state, **state}
+        for listener in self._listeners:
+            listener.put_nowait(self.state)
+
+    async def _delay(self):
+        await asyncio.sleep(self.latency + random.uniform(0, self.jitter))
+
+    async def _get_state(self, request):
+        self.requests.append((request.method, None))
+        await self._delay()
+        return web.json_response(self.state)
+
+    async def _post_state(self, request):
+        state = await request.json()
+        self.requests.append((request.method, state))
+        await self._delay()
+        self.set_state(state)
+        return web.json_response(self.state)
+
+    async def _events(self, request):
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        listener = asyncio.Queue()
+        self._listeners.add(listener)
+        try:
+            state = self.state
+            while state is not None:
+                await response.write(f"data: {json.dumps(state)}\n\n".encode())
+                state = await listener.get()
+        finally:
+            self._listeners.discard(listener)
+        return response
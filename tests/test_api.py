@@ -1,71 +1,112 @@
 """Test for the LED-Pi API."""
 
+import asyncio
+import json
+import logging
 import pytest
-import sys
-from unittest.mock import MagicMock, Mock
-
-mock_aiohttp_session = MagicMock()
-mock_aiohttp_client = MagicMock()
-mock_aiohttp_client.async_get_clientsession.return_value = mock_aiohttp_session
-sys.modules["homeassistant.helpers.aiohttp_client"] = mock_aiohttp_client
-
 from homeassistant.components.light import ATTR_RGB_COLOR, ATTR_BRIGHTNESS
+from aiohttp import hdrs
+from multidict import CIMultiDict
+from unittest.mock import AsyncMock, MagicMock, Mock
 
 from custom_components.ledpi import API
 from custom_components.ledpi.api import UnknownStateException
-from custom_components.ledpi.const import ATTR_STATE, ATTR_LEDS
+from custom_components.ledpi.breaker import (
+    STATE_CLOSED,
+    STATE_HALF_OPEN,
+    STATE_OPEN,
+    CircuitBreaker,
+)
+from custom_components.ledpi.const import (
+    ATTR_STATE,
+    ATTR_LEDS,
+    ATTR_PIXELS,
+    DEFAULT_ERROR_LOG_INTERVAL,
+    DEFAULT_MAX_CONNECTIONS,
+)
+from custom_components.ledpi.ratelimit import (
+    PRIORITY_FRAME,
+    PRIORITY_POLL,
+    PRIORITY_SAFETY,
+    PRIORITY_USER,
+    RateLimiter,
+)
+from custom_components.ledpi.realtime import FRAME_HEADER
+from custom_components.ledpi.trace import Trace
+from tests.controller import StandInController
+
+mock_aiohttp_session = MagicMock()
+mock_aiohttp_session.closed = False
+
+JSON_HEADERS = {hdrs.CONTENT_TYPE: "application/json"}
+
+
+def json_body(state):
+    return json.dumps(state).encode()
 
 
 class TestAPI:
     @pytest.fixture
     def api(self):
-        yield API(None, "host")
+        api = API(None, "host", retry_delay=0)
+        api._session = mock_aiohttp_session
+        yield api
+
+    @pytest.mark.asyncio
+    async def test_get_session(self):
+        api = API(None, "host")
+        session = api._get_session()
+        assert session is api._get_session()
+        assert session.connector.limit_per_host == DEFAULT_MAX_CONNECTIONS
+        await api.async_close()
+        assert session.closed
+        assert api._get_session() is not session
+        await api.async_close()
+        await api.async_close()
 
     def test_is_on(self, api):
-        api.data[ATTR_STATE] = "on"
+        api.data = {ATTR_STATE: "on"}
         assert api.is_on()
 
     def test_is_on_off(self, api):
-        api.data[ATTR_STATE] = "off"
+        api.data = {ATTR_STATE: "off"}
         assert not api.is_on()
 
     def test_is_on_no_state(self, api):
-        with pytest.raises(UnknownStateException):
-            api.is_on()
+        assert api.is_on() is None
 
     def test_rgb_hex_color(self, api):
-        api.data[ATTR_RGB_COLOR] = "#ffffff"
+        api.data = {ATTR_RGB_COLOR: "#ffffff"}
         assert api.rgb_hex_color() == "#ffffff"
 
     def test_rgb_hex_color_no_state(self, api):
-        with pytest.raises(UnknownStateException):
-            api.rgb_hex_color()
+        assert api.rgb_hex_color() is None
 
     def test_rgb_color(self, api):
-        api.data[ATTR_RGB_COLOR] = "#ffffff"
-        assert api.rgb_color() == [255, 255, 255]
+        api.data = {ATTR_RGB_COLOR: "#ffffff"}
+        assert api.rgb_color() == (255, 255, 255)
 
     def test_rgb_color_invalid(self, api):
-        api.data[ATTR_RGB_COLOR] = "#xxxxxx"
-        with pytest.raises(UnknownStateException):
-            api.rgb_color()
+        api.data = {ATTR_RGB_COLOR: "#xxxxxx"}
+        assert api.rgb_color() is None
 
     def test_rgb_color_no_state(self, api):
-        with pytest.raises(UnknownStateException):
-            api.rgb_color()
+        assert api.rgb_color() is None
 
     def test_rgb_name(self, api):
-        api.data[ATTR_RGB_COLOR] = "#ffffff"
+        api.data = {ATTR_RGB_COLOR: "#ffffff"}
         assert api.rgb_name() == "white"
 
+    def test_rgb_name_nearest(self, api):
+        api.data = {ATTR_RGB_COLOR: "#fe0101"}
+        assert api.rgb_name() == "red"
+
     def test_rgb_color_name(self, api):
-        api.data[ATTR_RGB_COLOR] = "#xxxxxx"
-        with pytest.raises(UnknownStateException):
-            api.rgb_name()
+        api.data = {ATTR_RGB_COLOR: "#xxxxxx"}
+        assert api.rgb_name() is None
 
     def test_rgb_name_no_state(self, api):
-        with pytest.raises(UnknownStateException):
-            api.rgb_name()
+        assert api.rgb_name() is None
 
     @pytest.mark.asyncio
     async def test_set_rgb(self, api):
@@ -82,9 +123,10 @@ class TestAPI:
         await api.set_rgb((255, 255, 255), True)
         mock_aiohttp_session.post.assert_called_with(
             "http://host/api/v1/state",
-            json={
-                ATTR_RGB_COLOR: "#ffffff",
-            },
+            timeout=api.timeout,
+            raise_for_status=True,
+            data=json_body({ATTR_RGB_COLOR: "#ffffff"}),
+            headers=JSON_HEADERS,
         )
 
     @pytest.mark.asyncio
@@ -93,13 +135,84 @@ class TestAPI:
         await api.set_rgb((255, 255, 255), True)
         assert mock_aiohttp_session.post.called
 
+    @pytest.mark.asyncio
+    async def test_post_state_coalesces_commands(self, api):
+        mock_aiohttp_session.post.reset_mock()
+        mock_aiohttp_session.post.side_effect = None
+        await asyncio.gather(
+            api.set_rgb((255, 255, 255), True),
+            api.set_brightness(0.5, True),
+            api.set_rgb((0, 0, 0), True),
+        )
+        mock_aiohttp_session.post.assert_called_once_with(
+            "http://host/api/v1/state",
+            timeout=api.timeout,
+            raise_for_status=True,
+            data=json_body({ATTR_RGB_COLOR: "#000000", ATTR_BRIGHTNESS: 0.5}),
+            headers=JSON_HEADERS,
+        )
+
+    @pytest.mark.asyncio
+    async def test_post_state_metrics(self, api):
+        mock_aiohttp_session.post.side_effect = None
+        api.command_delay = 0
+        await api.set_brightness(0.5, True)
+        assert api.metrics.latency["POST"].count == 1
+        assert api.metrics.bytes_sent == len(json_body({ATTR_BRIGHTNESS: 0.5}))
+
+    @pytest.mark.asyncio
+    async def test_post_state_keeps_order(self, api):
+        mock_aiohttp_session.post.reset_mock()
+        api.command_delay = 0
+        await api.set_brightness(0.5, True)
+        await api.set_brightness(1.0, True)
+        assert [
+            json.loads(c.kwargs["data"])
+            for c in mock_aiohttp_session.post.call_args_list
+        ] == [
+            {ATTR_BRIGHTNESS: 0.5},
+            {ATTR_BRIGHTNESS: 1.0},
+        ]
+
+    @pytest.mark.asyncio
+    async def test_post_state_optimistic(self, api):
+        mock_aiohttp_session.post.side_effect = None
+        api.optimistic = True
+        api.command_delay = 0
+        api.data = {ATTR_STATE: "on", ATTR_BRIGHTNESS: 1.0, ATTR_LEDS: 10}
+        await api.set_brightness(0.5, True)
+        assert api.data == {ATTR_STATE: "on", ATTR_BRIGHTNESS: 0.5, ATTR_LEDS: 10}
+
+    @pytest.mark.asyncio
+    async def test_post_state_optimistic_response(self, api):
+        mock_response = MagicMock()
+        mock_response.json = AsyncMock(return_value={ATTR_BRIGHTNESS: 0.25})
+        mock_aiohttp_session.post.side_effect = None
+        mock_aiohttp_session.post.return_value.__aenter__.return_value = mock_response
+        api.optimistic = True
+        api.command_delay = 0
+        await api.set_brightness(0.5, True)
+        assert api.data == {ATTR_BRIGHTNESS: 0.25}
+        mock_aiohttp_session.post.return_value = MagicMock()
+
+    @pytest.mark.asyncio
+    async def test_post_state_optimistic_invalid_response(self, api):
+        mock_response = MagicMock()
+        mock_response.json = AsyncMock(side_effect=Exception("error"))
+        mock_aiohttp_session.post.side_effect = None
+        mock_aiohttp_session.post.return_value.__aenter__.return_value = mock_response
+        api.optimistic = True
+        api.command_delay = 0
+        await api.set_brightness(0.5, True)
+        assert api.data == {ATTR_BRIGHTNESS: 0.5}
+        mock_aiohttp_session.post.return_value = MagicMock()
+
     def test_brightness(self, api):
-        api.data[ATTR_BRIGHTNESS] = 1.0
+        api.data = {ATTR_BRIGHTNESS: 1.0}
         assert api.brightness() == 1.0
 
     def test_brightness_no_state(self, api):
-        with pytest.raises(UnknownStateException):
-            api.brightness()
+        assert api.brightness() is None
 
     @pytest.mark.asyncio
     async def test_set_brightness(self, api):
@@ -111,9 +224,10 @@ class TestAPI:
         await api.set_brightness(1.0, True)
         mock_aiohttp_session.post.assert_called_with(
             "http://host/api/v1/state",
-            json={
-                ATTR_BRIGHTNESS: 1.0,
-            },
+            timeout=api.timeout,
+            raise_for_status=True,
+            data=json_body({ATTR_BRIGHTNESS: 1.0}),
+            headers=JSON_HEADERS,
         )
 
     @pytest.mark.asyncio
@@ -123,12 +237,11 @@ class TestAPI:
         assert mock_aiohttp_session.post.called
 
     def test_leds(self, api):
-        api.data[ATTR_LEDS] = 1
+        api.data = {ATTR_LEDS: 1}
         assert api.leds() == 1
 
     def test_leds_no_state(self, api):
-        with pytest.raises(UnknownStateException):
-            api.leds()
+        assert api.leds() is None
 
     @pytest.mark.asyncio
     async def test_turn_on(self, api):
@@ -136,7 +249,25 @@ class TestAPI:
         await api.turn_on()
         mock_aiohttp_session.post.assert_called_with(
             "http://host/api/v1/state",
-            json={ATTR_STATE: "on", ATTR_BRIGHTNESS: 1.0, ATTR_RGB_COLOR: "#ffffff"},
+            timeout=api.timeout,
+            raise_for_status=True,
+            data=json_body(
+                {ATTR_STATE: "on", ATTR_BRIGHTNESS: 1.0, ATTR_RGB_COLOR: "#ffffff"}
+            ),
+            headers=JSON_HEADERS,
+        )
+
+    @pytest.mark.asyncio
+    async def test_turn_on_no_state(self, api):
+        api.command_delay = 0
+        mock_aiohttp_session.post.side_effect = None
+        await api.turn_on()
+        mock_aiohttp_session.post.assert_called_with(
+            "http://host/api/v1/state",
+            timeout=api.timeout,
+            raise_for_status=True,
+            data=json_body({ATTR_STATE: "on"}),
+            headers=JSON_HEADERS,
         )
 
     @pytest.mark.asyncio
@@ -151,9 +282,10 @@ class TestAPI:
         await api.turn_off()
         mock_aiohttp_session.post.assert_called_with(
             "http://host/api/v1/state",
-            json={
-                ATTR_STATE: "off",
-            },
+            timeout=api.timeout,
+            raise_for_status=True,
+            data=json_body({ATTR_STATE: "off"}),
+            headers=JSON_HEADERS,
         )
 
     @pytest.mark.asyncio
@@ -170,17 +302,709 @@ class TestAPI:
 
     @pytest.mark.asyncio
     async def test_update(self, api):
-        mock_response = MagicMock()
-        mock_response.json.return_value = {ATTR_LEDS: 10}
-        mock_aiohttp_session.get.return_value = mock_response
+        mock_response = get_response(b'{"leds": 10}', headers={"ETag": "etag"})
+        mock_aiohttp_session.get.side_effect = None
+        mock_aiohttp_session.get.return_value.__aenter__.return_value = mock_response
         await api.update()
-        mock_aiohttp_session.get.assert_called_with("http://host/api/v1/state")
-        assert api.data != {}
+        mock_aiohttp_session.get.assert_called_with(
+            "http://host/api/v1/state",
+            timeout=api.timeout,
+            raise_for_status=True,
+            headers={},
+        )
+        assert api.data == {ATTR_LEDS: 10}
+        assert api.changed
+
+        await api.update()
+        mock_aiohttp_session.get.assert_called_with(
+            "http://host/api/v1/state",
+            timeout=api.timeout,
+            raise_for_status=True,
+            headers={"If-None-Match": "etag"},
+        )
+        assert not api.changed
+
+    @pytest.mark.asyncio
+    async def test_update_not_modified(self, api):
+        mock_response = get_response(b"", status=304)
+        mock_aiohttp_session.get.side_effect = None
+        mock_aiohttp_session.get.return_value.__aenter__.return_value = mock_response
+        api.data = {ATTR_LEDS: 10}
+        api._last_modified = "last_modified"
+        await api.update()
+        mock_aiohttp_session.get.assert_called_with(
+            "http://host/api/v1/state",
+            timeout=api.timeout,
+            raise_for_status=True,
+            headers={"If-Modified-Since": "last_modified"},
+        )
+        assert api.data == {ATTR_LEDS: 10}
+        assert not api.changed
+
+    @pytest.mark.asyncio
+    async def test_update_unchanged_body(self, api):
+        mock_response = get_response(b'{"leds": 10}')
+        mock_aiohttp_session.get.side_effect = None
+        mock_aiohttp_session.get.return_value.__aenter__.return_value = mock_response
+        await api.update()
+        assert api.changed
+        await api.update()
+        assert not api.changed
+        assert mock_response.read.call_count == 2
+        assert api.metrics.latency["GET"].count == 2
+        assert api.metrics.bytes_received == 24
+        assert api.metrics.last_poll is not None
+
+        await api.set_brightness(1.0)
+        await api.update()
+        assert api.changed
+        assert api.data == {ATTR_LEDS: 10}
 
     @pytest.mark.asyncio
     async def test_update_http_error(self, api):
         api.data = {ATTR_LEDS: 10}
+        api._digest = b"digest"
         mock_aiohttp_session.get.side_effect = Mock(side_effect=Exception("error"))
         await api.update()
-        mock_aiohttp_session.get.assert_called_with("http://host/api/v1/state")
+        mock_aiohttp_session.get.assert_called_with(
+            "http://host/api/v1/state",
+            timeout=api.timeout,
+            raise_for_status=True,
+            headers={},
+        )
         assert api.data == {}
+        assert api.changed
+        assert api._digest is None
+        assert api.metrics.errors == 1
+        assert api.metrics.last_poll is None
+
+    @pytest.mark.asyncio
+    async def test_update_trace(self, api):
+        api.trace = Trace(10)
+        mock_response = get_response(b'{"leds": 10}')
+        mock_aiohttp_session.get.side_effect = None
+        mock_aiohttp_session.get.return_value.__aenter__.return_value = mock_response
+        await api.update()
+        await api.update()
+        mock_response.status = 304
+        await api.update()
+        mock_aiohttp_session.get.side_effect = Mock(side_effect=Exception("error"))
+        await api.update()
+        entries = api.trace.dump()
+        assert [entry["bytes"] for entry in entries] == [12, 12, 0, 0]
+        assert all(entry["method"] == "GET" for entry in entries)
+        assert entries[-1]["error"] == "Exception"
+
+    @pytest.mark.asyncio
+    async def test_post_state_trace(self, api):
+        api.trace = Trace(10)
+        api.command_delay = 0.01
+        mock_aiohttp_session.post.side_effect = None
+        await api.set_brightness(0.5, True)
+        mock_aiohttp_session.post.side_effect = Mock(side_effect=Exception("error"))
+        await api.set_brightness(1.0, True)
+        entries = api.trace.dump()
+        assert entries[0]["method"] == "POST"
+        assert entries[0]["bytes"] == len(json_body({ATTR_BRIGHTNESS: 0.5}))
+        assert entries[0]["queue_wait_ms"] >= 10
+        assert entries[0]["error"] is None
+        assert entries[1]["error"] == "Exception"
+
+    @pytest.mark.asyncio
+    async def test_async_send_state(self, api):
+        api.data = {ATTR_BRIGHTNESS: 1.0}
+        mock_aiohttp_session.post.side_effect = None
+        mock_aiohttp_session.post.return_value.__aenter__.return_value = get_response(
+            b""
+        )
+        assert await api.async_send_state({ATTR_BRIGHTNESS: 0.5})
+        assert api.data == {ATTR_BRIGHTNESS: 0.5}
+        assert api.changed
+
+        mock_aiohttp_session.post.side_effect = Mock(side_effect=Exception("error"))
+        assert not await api.async_send_state({ATTR_BRIGHTNESS: 0.2})
+        assert api.data == {ATTR_BRIGHTNESS: 0.5}
+
+    @pytest.mark.asyncio
+    async def test_rate_limit(self, api):
+        api.limiter = MagicMock()
+        api.limiter.acquire = AsyncMock(return_value=False)
+        api.changed = True
+        mock_aiohttp_session.get.reset_mock()
+        await api.update()
+        assert not mock_aiohttp_session.get.called
+        assert not api.changed
+        api.limiter.acquire.assert_called_with(PRIORITY_POLL)
+
+        api._send_state = AsyncMock()
+        await api._send_frame({ATTR_BRIGHTNESS: 0.5})
+        assert not api._send_state.called
+        api.limiter.acquire.assert_called_with(PRIORITY_FRAME)
+
+        api.command_delay = 0
+        await api.turn_off()
+        api.limiter.acquire.assert_called_with(PRIORITY_SAFETY)
+        await api.set_brightness(0.5, True)
+        api.limiter.acquire.assert_called_with(PRIORITY_USER)
+        assert api._send_state.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_rate_limit_turn_off_first(self, api):
+        loop = asyncio.get_running_loop()
+        api.limiter = RateLimiter(2, burst=1)
+        api.command_delay = 0
+        mock_aiohttp_session.post.side_effect = None
+        sends = [
+            asyncio.ensure_future(api.async_send_state({ATTR_BRIGHTNESS: i / 10}))
+            for i in range(10)
+        ]
+        commands = [
+            asyncio.ensure_future(api.set_brightness(i / 30, True)) for i in range(30)
+        ]
+        await asyncio.sleep(0.01)
+        start = loop.time()
+        await api.turn_off()
+        assert loop.time() - start < 1.5
+        assert json.loads(mock_aiohttp_session.post.call_args.kwargs["data"]) == {
+            ATTR_BRIGHTNESS: 29 / 30,
+            ATTR_STATE: "off",
+        }
+        await asyncio.gather(*commands)
+        for send in sends:
+            send.cancel()
+        await asyncio.gather(*sends, return_exceptions=True)
+
+    @pytest.mark.asyncio
+    async def test_rate_limit_turn_off_while_waiting(self, api):
+        api.limiter = RateLimiter(2, burst=1)
+        api.command_delay = 0
+        mock_aiohttp_session.post.side_effect = None
+        send = asyncio.ensure_future(api.async_send_state({ATTR_BRIGHTNESS: 0.1}))
+        waiting = asyncio.ensure_future(api.async_send_state({ATTR_BRIGHTNESS: 0.2}))
+        command = asyncio.ensure_future(api.set_brightness(0.5, True))
+        await asyncio.sleep(0.01)
+        await api.turn_off()
+        assert not waiting.done()
+        await asyncio.gather(send, waiting, command)
+
+    @pytest.mark.asyncio
+    async def test_rate_limit_before_circuit_breaker(self, api):
+        api.limiter = MagicMock()
+        api.limiter.acquire = AsyncMock(return_value=False)
+        api.breaker = MagicMock()
+        await api.update()
+        assert not api.breaker.allow_request.called
+
+    @pytest.mark.asyncio
+    async def test_rate_limit_disabled(self):
+        api = API(None, "host", rate_limit=0)
+        assert api.limiter is None
+        assert await api._acquire(PRIORITY_POLL)
+
+    @pytest.mark.asyncio
+    async def test_update_error_log_rate_limited(self, api, caplog):
+        api.breaker = CircuitBreaker(failure_threshold=10)
+        mock_aiohttp_session.get.side_effect = Mock(side_effect=Exception("error"))
+        with caplog.at_level(logging.ERROR):
+            await api.update()
+            await api.update()
+            await api.update()
+        assert len(caplog.records) == 1
+        assert api._suppressed == 2
+
+        api._logged_at -= DEFAULT_ERROR_LOG_INTERVAL
+        caplog.clear()
+        with caplog.at_level(logging.ERROR):
+            await api.update()
+        assert len(caplog.records) == 1
+        assert "2 more since the last message" in caplog.text
+        assert api._suppressed == 0
+        mock_aiohttp_session.get.side_effect = None
+
+    @pytest.mark.asyncio
+    async def test_update_cancelled(self, api):
+        mock_aiohttp_session.get.side_effect = Mock(
+            side_effect=asyncio.CancelledError()
+        )
+        with pytest.raises(asyncio.CancelledError):
+            await api.update()
+        assert api.metrics.errors == 0
+        assert api.breaker.failures == 0
+        mock_aiohttp_session.get.side_effect = None
+
+    @pytest.mark.asyncio
+    async def test_apply_state_cancelled(self, api):
+        response = MagicMock()
+        response.json = AsyncMock(side_effect=asyncio.CancelledError())
+        with pytest.raises(asyncio.CancelledError):
+            await api._apply_state({ATTR_BRIGHTNESS: 0.5}, response)
+        assert not api.changed
+
+    @pytest.mark.asyncio
+    async def test_update_timeout(self, api):
+        mock_aiohttp_session.get.side_effect = Mock(side_effect=asyncio.TimeoutError())
+        await api.update()
+        assert api.metrics.timeouts == 1
+
+    @pytest.mark.asyncio
+    async def test_update_circuit_breaker_open(self, api):
+        api.breaker = CircuitBreaker(failure_threshold=1)
+        mock_aiohttp_session.get.reset_mock()
+        mock_aiohttp_session.get.side_effect = Mock(side_effect=Exception("error"))
+        await api.update()
+        assert not api.available
+        await api.update()
+        assert mock_aiohttp_session.get.call_count == 1
+        assert not api.changed
+
+    @pytest.mark.asyncio
+    async def test_post_state_retries(self, api):
+        api.command_delay = 0
+        mock_aiohttp_session.post.reset_mock()
+        mock_aiohttp_session.post.side_effect = [Exception("error"), MagicMock()]
+        await api.set_brightness(0.5, True)
+        assert mock_aiohttp_session.post.call_count == 2
+        assert mock_aiohttp_session.post.call_args.kwargs["data"] == json_body(
+            {ATTR_BRIGHTNESS: 0.5}
+        )
+        assert api.metrics.retries == 1
+        assert api.metrics.errors == 1
+
+    @pytest.mark.asyncio
+    async def test_post_state_retries_bounded(self, api):
+        api.breaker = CircuitBreaker(failure_threshold=10)
+        api.command_delay = 0
+        mock_aiohttp_session.post.reset_mock()
+        mock_aiohttp_session.post.side_effect = Mock(side_effect=Exception("error"))
+        await api.set_brightness(0.5, True)
+        assert mock_aiohttp_session.post.call_count == api.max_retries + 1
+        assert api.metrics.retries == api.max_retries
+
+    @pytest.mark.asyncio
+    async def test_post_state_no_retry_circuit_breaker_open(self, api):
+        api.breaker = CircuitBreaker(failure_threshold=1)
+        api.command_delay = 0
+        mock_aiohttp_session.post.reset_mock()
+        mock_aiohttp_session.post.side_effect = Mock(side_effect=Exception("error"))
+        await api.set_brightness(0.5, True)
+        assert mock_aiohttp_session.post.call_count == 1
+        assert api.metrics.retries == 0
+
+    @pytest.mark.asyncio
+    async def test_post_state_retry_superseded(self, api):
+        api.command_delay = 0
+        api.retry_delay = 10
+        mock_aiohttp_session.post.reset_mock()
+        mock_aiohttp_session.post.side_effect = [Exception("error"), MagicMock()]
+        first = asyncio.ensure_future(api.set_rgb((255, 0, 0), True))
+        while not mock_aiohttp_session.post.called:
+            await asyncio.sleep(0)
+        await asyncio.wait_for(
+            asyncio.gather(first, api.set_brightness(0.5, True)), timeout=1
+        )
+        assert mock_aiohttp_session.post.call_count == 2
+        assert json.loads(mock_aiohttp_session.post.call_args.kwargs["data"]) == {
+            ATTR_RGB_COLOR: "#ff0000",
+            ATTR_BRIGHTNESS: 0.5,
+        }
+        assert api.metrics.retries == 0
+
+    @pytest.mark.asyncio
+    async def test_post_state_skips_confirmed_state(self, api):
+        api.command_delay = 0
+        mock_aiohttp_session.post.reset_mock()
+        mock_aiohttp_session.post.side_effect = None
+        await api.update({ATTR_STATE: "on", ATTR_BRIGHTNESS: 0.5})
+        await api.set_brightness(0.5, True)
+        assert not mock_aiohttp_session.post.called
+        assert api.metrics.skipped == 1
+
+        await api.set_brightness(0.5, True, force=True)
+        await api.set_brightness(1.0, True)
+        await api.set_rgb((255, 0, 0), True)
+        assert mock_aiohttp_session.post.call_count == 3
+
+        # accepted states are confirmed
+        await api.set_rgb((255, 0, 0), True)
+        await api.turn_off()
+        await api.turn_off()
+        assert mock_aiohttp_session.post.call_count == 4
+        assert api.metrics.skipped == 3
+
+    @pytest.mark.asyncio
+    async def test_post_state_sends_unconfirmed_state(self, api):
+        api.command_delay = 0
+        mock_aiohttp_session.post.reset_mock()
+        mock_aiohttp_session.post.side_effect = None
+        await api.update({ATTR_STATE: "on", ATTR_BRIGHTNESS: 0.5}, confirmed=False)
+        assert api.brightness() == 0.5
+        await api.set_brightness(0.5, True)
+        assert mock_aiohttp_session.post.called
+        assert api.metrics.skipped == 0
+
+    @pytest.mark.asyncio
+    async def test_post_state_skips_pending_state(self, api):
+        mock_aiohttp_session.post.reset_mock()
+        mock_aiohttp_session.post.side_effect = None
+        await api.update({ATTR_BRIGHTNESS: 1.0})
+        await asyncio.gather(
+            api.set_brightness(0.5, True),
+            api.set_brightness(1.0, True),
+            api.set_brightness(1.0, True),
+        )
+        mock_aiohttp_session.post.assert_called_once()
+        assert json.loads(mock_aiohttp_session.post.call_args.kwargs["data"]) == {
+            ATTR_BRIGHTNESS: 1.0
+        }
+
+    @pytest.mark.asyncio
+    async def test_post_state_sends_stale_state(self, api):
+        api.command_delay = 0
+        mock_aiohttp_session.post.reset_mock()
+        mock_aiohttp_session.post.side_effect = None
+        await api.update({ATTR_BRIGHTNESS: 0.5})
+        api._confirmed_at -= api.max_state_age + 1
+        await api.set_brightness(0.5, True)
+        assert mock_aiohttp_session.post.call_count == 1
+
+        api.max_state_age = 0
+        await api.set_brightness(0.5, True)
+        assert mock_aiohttp_session.post.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_post_state_confirmed_by_poll(self, api):
+        api.command_delay = 0
+        mock_aiohttp_session.post.reset_mock()
+        mock_aiohttp_session.post.side_effect = None
+        mock_aiohttp_session.get.side_effect = None
+        mock_aiohttp_session.get.return_value.__aenter__.return_value = get_response(
+            b'{"brightness": 0.5}'
+        )
+        await api.update()
+        await api.update()
+        await api.set_brightness(0.5, True)
+        assert not mock_aiohttp_session.post.called
+
+        mock_aiohttp_session.get.side_effect = Mock(side_effect=Exception("error"))
+        await api.update()
+        await api.set_brightness(0.5, True)
+        assert mock_aiohttp_session.post.called
+        mock_aiohttp_session.get.side_effect = None
+
+    @pytest.mark.asyncio
+    async def test_async_send_state_skips_confirmed_state(self, api):
+        mock_aiohttp_session.post.reset_mock()
+        mock_aiohttp_session.post.side_effect = None
+        await api.update({ATTR_STATE: "on", ATTR_PIXELS: "ff0000"})
+        assert await api.async_send_state({ATTR_PIXELS: bytearray(b"\xff\x00\x00")})
+        assert not mock_aiohttp_session.post.called
+        assert await api.async_send_state({ATTR_STATE: "on"}, force=True)
+        assert mock_aiohttp_session.post.called
+
+    @pytest.mark.asyncio
+    async def test_post_state_circuit_breaker_open(self, api):
+        api.breaker = CircuitBreaker(failure_threshold=1)
+        api.command_delay = 0
+        mock_aiohttp_session.post.reset_mock()
+        mock_aiohttp_session.post.side_effect = Mock(side_effect=Exception("error"))
+        await api.turn_off()
+        assert not api.available
+        await api.turn_off()
+        assert mock_aiohttp_session.post.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_stream(self, api):
+        loop = asyncio.get_running_loop()
+        frames = asyncio.Queue()
+        receiver = MagicMock(spec=asyncio.DatagramProtocol)
+        receiver.datagram_received = lambda data, addr: frames.put_nowait(data)
+        transport, _ = await loop.create_datagram_endpoint(
+            lambda: receiver, local_addr=("127.0.0.1", 0)
+        )
+        api.host = "127.0.0.1:8080"
+        api.stream_port = transport.get_extra_info("sockname")[1]
+        api.data = {ATTR_RGB_COLOR: "#ff0000", ATTR_BRIGHTNESS: 0.5, ATTR_LEDS: 2}
+        api._post_state = AsyncMock()
+        try:
+            assert not api.stream_frame()
+            await api.start_stream()
+            stream = api._stream
+            await api.start_stream()
+            assert api._stream is stream
+            assert api.streaming
+
+            assert api.stream_frame()
+            frame = await asyncio.wait_for(frames.get(), 1)
+            assert FRAME_HEADER.unpack_from(frame)[4] == 128
+            assert frame[FRAME_HEADER.size :] == bytes((255, 0, 0))
+
+            assert api.stream_frame((0, 0, 255), 1.0)
+            assert api.stream_frame(pixels=bytes(6))
+            with pytest.raises(ValueError):
+                api.stream_frame(pixels=bytes(3))
+            await asyncio.wait_for(frames.get(), 1)
+            frame = await asyncio.wait_for(frames.get(), 1)
+            assert FRAME_HEADER.unpack_from(frame)[4] == 255
+            assert len(frame) == FRAME_HEADER.size + 6
+
+            await api.stop_stream()
+            assert not api.streaming
+            api._post_state.assert_called_once_with(
+                {ATTR_RGB_COLOR: "#0000ff", ATTR_BRIGHTNESS: 1.0}
+            )
+            await api.stop_stream()
+            assert api._post_state.call_count == 1
+        finally:
+            transport.close()
+
+    @pytest.mark.asyncio
+    async def test_stream_unknown_state(self, api):
+        api.host = "127.0.0.1"
+        api._session = None
+        api._post_state = AsyncMock()
+        await api.start_stream()
+        stream = api._stream
+        stream.send = MagicMock(return_value=True)
+        assert api.stream_frame()
+        stream.send.assert_called_with(1.0, bytes((255, 255, 255)))
+        await api.async_close()
+        assert not api.streaming
+        assert not api._post_state.called
+
+    @pytest.mark.asyncio
+    async def test_transition(self, api):
+        api.data = {ATTR_STATE: "off", ATTR_BRIGHTNESS: 0.8, ATTR_RGB_COLOR: "#000000"}
+        api._send_state = AsyncMock()
+        await api.transition(0.1, rgb_color=(255, 255, 255))
+        await api._animation
+        frames = [call.args[0] for call in api._send_state.call_args_list]
+        assert frames[0][ATTR_STATE] == "on"
+        assert frames[0][ATTR_BRIGHTNESS] < 0.8
+        assert frames[-1] == {ATTR_BRIGHTNESS: 0.8, ATTR_RGB_COLOR: "#ffffff"}
+
+    @pytest.mark.asyncio
+    async def test_transition_turn_off(self, api):
+        api.data = {ATTR_STATE: "on", ATTR_BRIGHTNESS: 0.5, ATTR_RGB_COLOR: "#ff0000"}
+        api._send_state = AsyncMock()
+        await api.transition(0.1, turn_off=True)
+        await api._animation
+        frames = [call.args[0] for call in api._send_state.call_args_list]
+        assert ATTR_STATE not in frames[0]
+        assert ATTR_RGB_COLOR not in frames[0]
+        assert frames[-1] == {ATTR_STATE: "off", ATTR_BRIGHTNESS: 0.5}
+
+    @pytest.mark.asyncio
+    async def test_transition_cancelled_by_command(self, api):
+        api.command_delay = 0
+        api._send_state = AsyncMock()
+        await api.transition(10, brightness=1.0)
+        transition = api._animation
+        await asyncio.sleep(0)
+        await api.turn_off()
+        assert transition.cancelled()
+        assert api._send_state.call_args.args[0] == {ATTR_STATE: "off"}
+        await api.transition(10, brightness=1.0)
+        transition = api._animation
+        api._session = None
+        await api.async_close()
+        await asyncio.sleep(0)
+        assert transition.cancelled()
+
+    @pytest.mark.asyncio
+    async def test_transition_cancelled_in_flight(self):
+        controller = StandInController(latency=0.2)
+        await controller.start()
+        api = API(None, controller.host, command_delay=0, rate_limit=0)
+        try:
+            await api.update()
+            await api.transition(3, brightness=0.0)
+            transition = api._animation
+            await wait_for(lambda: posted(controller))
+            await api.set_brightness(0.5, True)
+            assert transition.done()
+            count = len(posted(controller))
+            await asyncio.sleep(0.5)
+            assert len(posted(controller)) == count
+            assert posted(controller)[-1] == {ATTR_BRIGHTNESS: 0.5}
+            assert api.metrics.errors == 0
+            assert api.breaker.failures == 0
+        finally:
+            await api.async_close()
+            await controller.stop()
+
+    @pytest.mark.asyncio
+    async def test_set_segment_batches_segments(self, api):
+        api.data = {ATTR_LEDS: 5}
+        api.command_delay = 0.01
+        api._send_state = AsyncMock()
+        await asyncio.gather(
+            api.set_segment(0, 2, (255, 0, 0)),
+            api.set_segment(1, 2, (0, 0, 255)),
+        )
+        assert api._send_state.call_count == 1
+        assert api._send_state.call_args.args[0] == {
+            ATTR_PIXELS: "ff0000" * 2 + "0000ff" * 3,
+            ATTR_STATE: "on",
+        }
+        await api.set_segment(1, 2)
+        assert api._send_state.call_args.args[0] == {
+            ATTR_PIXELS: "ff0000" * 2 + "000000" * 3
+        }
+
+    @pytest.mark.asyncio
+    async def test_set_segment_resizes_frame_buffer(self, api):
+        api.data = {ATTR_LEDS: 2}
+        api._post_state = AsyncMock()
+        await api.set_segment(0, 1, (1, 2, 3))
+        assert api.pixels == bytearray((1, 2, 3, 1, 2, 3))
+        api.data = {ATTR_LEDS: 1}
+        await api.set_segment(0, 1, (1, 2, 3))
+        assert api.pixels == bytearray((1, 2, 3))
+
+    @pytest.mark.asyncio
+    async def test_set_segment_more_segments_than_leds(self, api):
+        api.data = {ATTR_LEDS: 2}
+        api._post_state = AsyncMock()
+        await api.set_segment(0, 3, (1, 2, 3))
+        await api.set_segment(1, 3, (4, 5, 6))
+        await api.set_segment(2, 3, (7, 8, 9))
+        assert api.pixels == bytearray((1, 2, 3, 4, 5, 6))
+        assert api._post_state.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_set_segment_no_state(self, api):
+        with pytest.raises(UnknownStateException):
+            await api.set_segment(0, 1, (1, 2, 3))
+
+    @pytest.mark.asyncio
+    async def test_start_effect(self, api):
+        api.data = {ATTR_RGB_COLOR: "#ff0000"}
+        api._send_state = AsyncMock()
+        await api.start_effect("breathe")
+        assert api.effect == "breathe"
+        await asyncio.sleep(0.01)
+        frame = api._send_state.call_args_list[0].args[0]
+        assert frame[ATTR_STATE] == "on"
+        assert frame[ATTR_RGB_COLOR] == "#ff0000"
+        runner = api.effect_runner
+        assert runner.sent > 0
+
+        api.command_delay = 0
+        await api.turn_off()
+        assert api.effect is None
+        sent = runner.sent
+        await asyncio.sleep(0.01)
+        assert runner.sent == sent
+
+    @pytest.mark.asyncio
+    async def test_effect_cancelled_in_flight(self):
+        controller = StandInController(latency=0.1)
+        await controller.start()
+        api = API(None, controller.host, command_delay=0, rate_limit=0)
+        try:
+            await api.update()
+            await api.start_effect("breathe")
+            effect = api._animation
+            await wait_for(lambda: posted(controller))
+            await api.turn_off()
+            assert effect.done()
+            count = len(posted(controller))
+            await asyncio.sleep(0.5)
+            assert len(posted(controller)) == count
+            assert posted(controller)[-1] == {ATTR_STATE: "off"}
+            assert controller.state[ATTR_STATE] == "off"
+        finally:
+            await api.async_close()
+            await controller.stop()
+
+    @pytest.mark.asyncio
+    async def test_segments_keep_led_count(self):
+        controller = StandInController()
+        controller.set_state({ATTR_LEDS: 4})
+        await controller.start()
+        api = API(None, controller.host, command_delay=0, optimistic=True)
+        try:
+            await api.update()
+            await api.set_segment(0, 2, (255, 0, 0))
+            await api.set_segment(1, 2, (0, 0, 255))
+            assert api.leds() == 4
+            assert api.is_on()
+            assert posted(controller)[-1] == {
+                ATTR_PIXELS: "ff0000ff00000000ff0000ff",
+                ATTR_STATE: "on",
+            }
+
+            await api.start_effect("chase")
+            await wait_for(lambda: len(posted(controller)) > 3)
+            assert api._animation is not None and not api._animation.done()
+        finally:
+            await api.async_close()
+            await controller.stop()
+
+    @pytest.mark.asyncio
+    async def test_circuit_breaker_probe_cancelled(self):
+        controller = StandInController(latency=0.2)
+        await controller.start()
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        api = API(None, controller.host, command_delay=0, breaker=breaker)
+        try:
+            await api.update()
+            breaker.record_failure()
+            await api.transition(3, brightness=0.0)
+            await wait_for(lambda: posted(controller))
+            assert breaker.state == STATE_HALF_OPEN
+            api.cancel_animation()
+            await asyncio.sleep(0.01)
+            assert breaker.state == STATE_OPEN
+            assert api.metrics.errors == 0
+
+            await api.set_brightness(0.5, True)
+            assert breaker.state == STATE_CLOSED
+            assert posted(controller)[-1] == {ATTR_BRIGHTNESS: 0.5}
+        finally:
+            await api.async_close()
+            await controller.stop()
+
+    @pytest.mark.asyncio
+    async def test_async_send_state_supersedes_pending_command(self):
+        controller = StandInController()
+        await controller.start()
+        api = API(None, controller.host, command_delay=0.2)
+        try:
+            command = asyncio.ensure_future(api.set_brightness(0.2, True))
+            await asyncio.sleep(0.05)
+            assert await api.async_send_state({ATTR_BRIGHTNESS: 0.9})
+            await command
+            assert posted(controller) == [{ATTR_BRIGHTNESS: 0.9}]
+            assert controller.state[ATTR_BRIGHTNESS] == 0.9
+            assert api.brightness() == 0.9
+
+            command = asyncio.ensure_future(api.set_rgb((255, 0, 0), True))
+            await asyncio.sleep(0.05)
+            assert await api.async_send_state({ATTR_BRIGHTNESS: 0.5})
+            await command
+            assert posted(controller)[-1] == {ATTR_RGB_COLOR: "#ff0000"}
+            assert controller.state[ATTR_BRIGHTNESS] == 0.5
+        finally:
+            await api.async_close()
+            await controller.stop()
+
+
+def posted(controller):
+    return [state for method, state in controller.requests if method == "POST"]
+
+
+async def wait_for(condition, timeout=5):
+    for _ in range(int(timeout / 0.01)):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("condition not met")
+
+
+def get_response(body, status=200, headers=None):
+    mock_response = MagicMock()
+    mock_response.status = status
+    mock_response.headers = CIMultiDict(headers or {})
+    mock_response.read = AsyncMock(return_value=body)
+    return mock_response
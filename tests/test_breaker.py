@@ -0,0 +1,75 @@
+"""Test for the LED-Pi Circuit Breaker."""
+
+import pytest
+from unittest.mock import patch
+
+from custom_components.ledpi.breaker import (
+    STATE_CLOSED,
+    STATE_HALF_OPEN,
+    STATE_OPEN,
+    CircuitBreaker,
+)
+
+
+class TestCircuitBreaker:
+    @pytest.fixture
+    def breaker(self):
+        yield CircuitBreaker(failure_threshold=2, reset_timeout=60)
+
+    def test_closed(self, breaker):
+        assert breaker.state == STATE_CLOSED
+        assert breaker.available
+        assert breaker.allow_request()
+
+    def test_opens_after_failures(self, breaker):
+        breaker.record_failure()
+        assert breaker.state == STATE_CLOSED
+        breaker.record_failure()
+        assert breaker.state == STATE_OPEN
+        assert not breaker.available
+        assert not breaker.allow_request()
+
+    def test_success_resets_failures(self, breaker):
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        assert breaker.state == STATE_CLOSED
+
+    @patch("custom_components.ledpi.breaker.monotonic")
+    def test_probe(self, mock_monotonic, breaker):
+        mock_monotonic.return_value = 0
+        breaker.record_failure()
+        breaker.record_failure()
+
+        mock_monotonic.return_value = 60
+        assert breaker.allow_request()
+        assert breaker.state == STATE_HALF_OPEN
+        assert not breaker.allow_request()
+
+        breaker.record_failure()
+        assert breaker.state == STATE_OPEN
+        assert not breaker.allow_request()
+
+        mock_monotonic.return_value = 120
+        assert breaker.allow_request()
+        breaker.record_success()
+        assert breaker.state == STATE_CLOSED
+        assert breaker.allow_request()
+
+    @patch("custom_components.ledpi.breaker.monotonic")
+    def test_release_probe(self, mock_monotonic, breaker):
+        mock_monotonic.return_value = 0
+        breaker.record_failure()
+        breaker.record_failure()
+
+        mock_monotonic.return_value = 60
+        assert breaker.allow_request()
+        breaker.release()
+        assert breaker.state == STATE_OPEN
+        assert breaker.failures == 2
+        assert breaker.allow_request()
+        assert breaker.state == STATE_HALF_OPEN
+
+    def test_release_closed(self, breaker):
+        breaker.release()
+        assert breaker.state == STATE_CLOSED
@@ -0,0 +1,46 @@
+"""Test for the LED-Pi Color Helpers."""
+
+import pytest
+import webcolors
+
+from custom_components.ledpi.colors import NearestColorIndex, css3_index, rgb_to_lab
+
+
+def test_rgb_to_lab():
+    assert rgb_to_lab((0, 0, 0)) == pytest.approx((0, 0, 0), abs=0.01)
+    assert rgb_to_lab((255, 255, 255)) == pytest.approx((100, 0, 0), abs=0.02)
+    assert rgb_to_lab((255, 0, 0)) == pytest.approx((53.24, 80.09, 67.2), abs=0.1)
+
+
+class TestNearestColorIndex:
+    def test_nearest_exact(self):
+        index = css3_index()
+        for hex_color, name in webcolors.CSS3_HEX_TO_NAMES.items():
+            assert index.nearest(tuple(webcolors.hex_to_rgb(hex_color))) == name
+
+    def test_nearest(self):
+        index = css3_index()
+        assert index.nearest((254, 1, 1)) == "red"
+        assert index.nearest((250, 250, 250)) == "white"
+        assert index.nearest((0, 0, 120)) == "navy"
+
+    def test_nearest_matches_linear_search(self):
+        colors = {
+            name: tuple(webcolors.hex_to_rgb(hex_color))
+            for hex_color, name in webcolors.CSS3_HEX_TO_NAMES.items()
+        }
+        index = NearestColorIndex(colors)
+        for rgb in [
+            (r, g, b) for r in (0, 70, 140, 210) for g in (30, 130) for b in (60, 250)
+        ]:
+            target = rgb_to_lab(rgb)
+            expected = min(
+                colors,
+                key=lambda name: sum(
+                    (a - b) ** 2 for a, b in zip(rgb_to_lab(colors[name]), target)
+                ),
+            )
+            assert index.nearest(rgb) == expected
+
+    def test_nearest_empty(self):
+        assert NearestColorIndex({}).nearest((0, 0, 0)) is None
@@ -1,10 +1,22 @@
 """Test for the LED-Pi Light Entity."""
 
 import pytest
+import voluptuous as vol
 from homeassistant.const import CONF_HOST, CONF_NAME, CONF_SCAN_INTERVAL
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 
-from custom_components.ledpi.config_flow import LedPiFlowHandler
+from custom_components.ledpi.config_flow import (
+    OPTIONS,
+    LedPiFlowHandler,
+    LedPiOptionsFlowHandler,
+)
+from custom_components.ledpi.const import (
+    CONF_COMMAND_DELAY,
+    CONF_CONNECT_TIMEOUT,
+    CONF_FAILURE_THRESHOLD,
+    CONF_MIN_SCAN_INTERVAL,
+    CONF_READ_TIMEOUT,
+)
 
 
 class TestLedPiFlowHandler:
@@ -50,3 +62,54 @@ class TestLedPiFlowHandler:
         assert mock_async_endpoint_existed.called
         assert not mock_async_abort.called
         assert mock_async_create_entry.called
+
+    def test_async_get_options_flow(self):
+        assert isinstance(
+            LedPiFlowHandler.async_get_options_flow(MagicMock()),
+            LedPiOptionsFlowHandler,
+        )
+
+
+class TestLedPiOptionsFlowHandler:
+    @pytest.fixture
+    def options_flow(self):
+        config_entry = MagicMock()
+        config_entry.options = {}
+        yield LedPiOptionsFlowHandler(config_entry)
+
+    @patch(
+        "custom_components.ledpi.config_flow.LedPiOptionsFlowHandler.async_show_form"
+    )
+    @pytest.mark.asyncio
+    async def test_async_step_init_without_data(
+        self, mock_async_show_form, options_flow
+    ):
+        await options_flow.async_step_init(None)
+        assert mock_async_show_form.called
+
+    @patch(
+        "custom_components.ledpi.config_flow.LedPiOptionsFlowHandler.async_create_entry"
+    )
+    @pytest.mark.asyncio
+    async def test_async_step_init_with_data(
+        self, mock_async_create_entry, options_flow
+    ):
+        await options_flow.async_step_init({CONF_COMMAND_DELAY: 100})
+        mock_async_create_entry.assert_called_with(
+            title="", data={CONF_COMMAND_DELAY: 100}
+        )
+
+    @pytest.mark.parametrize(
+        "key",
+        (
+            CONF_MIN_SCAN_INTERVAL,
+            CONF_CONNECT_TIMEOUT,
+            CONF_READ_TIMEOUT,
+            CONF_FAILURE_THRESHOLD,
+        ),
+    )
+    def test_options_at_least_one(self, key):
+        validator = dict(OPTIONS)[key]
+        assert validator("1") == 1
+        with pytest.raises(vol.Invalid):
+            validator(0)
@@ -0,0 +1,125 @@
+"""Test for the LED-Pi Update Coordinator."""
+
+import pytest
+from datetime import timedelta
+from homeassistant.components.light import ATTR_BRIGHTNESS
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from custom_components.ledpi.coordinator import LedPiCoordinator
+from custom_components.ledpi.trace import TRIGGER
+
+
+class TestLedPiCoordinator:
+    @pytest.fixture
+    def api(self):
+        api = MagicMock()
+        api.data = {}
+        api.update = AsyncMock()
+        yield api
+
+    @pytest.fixture
+    def coordinator(self, api):
+        yield LedPiCoordinator(
+            MagicMock(),
+            MagicMock(),
+            api,
+            "name",
+            min_interval=timedelta(seconds=10),
+            max_interval=timedelta(minutes=1),
+            boost_duration=timedelta(seconds=60),
+        )
+
+    def test_min_interval_capped(self, api):
+        coordinator = LedPiCoordinator(
+            MagicMock(),
+            MagicMock(),
+            api,
+            "name",
+            min_interval=timedelta(minutes=5),
+            max_interval=timedelta(minutes=1),
+            boost_duration=timedelta(seconds=60),
+        )
+        assert coordinator.min_interval == timedelta(minutes=1)
+
+    @pytest.mark.asyncio
+    async def test_update_trigger(self, api, coordinator):
+        triggers = []
+        api.update.side_effect = lambda: triggers.append(TRIGGER.get())
+        await coordinator._async_update_data()
+        token = TRIGGER.set("light.ledpi.async_turn_on")
+        try:
+            await coordinator._async_update_data()
+        finally:
+            TRIGGER.reset(token)
+        assert triggers == ["poll", "light.ledpi.async_turn_on"]
+        assert TRIGGER.get() is None
+
+    @pytest.mark.asyncio
+    async def test_update_boosts_on_change(self, api, coordinator):
+        api.data = {ATTR_BRIGHTNESS: 1.0}
+        assert await coordinator._async_update_data() == {ATTR_BRIGHTNESS: 1.0}
+        assert api.update.called
+        assert coordinator.update_interval == timedelta(seconds=10)
+
+    @pytest.mark.asyncio
+    async def test_update_backs_off_when_stable(self, api, coordinator):
+        api.data = {ATTR_BRIGHTNESS: 1.0}
+        with patch("custom_components.ledpi.coordinator.monotonic") as mock_monotonic:
+            mock_monotonic.return_value = 0
+            await coordinator._async_update_data()
+            api.changed = False
+            mock_monotonic.return_value = 100
+            await coordinator._async_update_data()
+            assert coordinator.update_interval == timedelta(seconds=20)
+            await coordinator._async_update_data()
+            await coordinator._async_update_data()
+            assert coordinator.update_interval == timedelta(minutes=1)
+
+    @pytest.mark.asyncio
+    async def test_update_backs_off_when_unreachable(self, api, coordinator):
+        await coordinator._async_update_data()
+        assert coordinator.update_interval == timedelta(seconds=20)
+
+    @pytest.mark.asyncio
+    async def test_update_with_scheduler(self, api):
+        scheduler = MagicMock()
+        scheduler.async_poll = AsyncMock()
+        coordinator = LedPiCoordinator(
+            MagicMock(),
+            MagicMock(),
+            api,
+            "name",
+            min_interval=timedelta(seconds=10),
+            max_interval=timedelta(minutes=1),
+            boost_duration=timedelta(seconds=60),
+            scheduler=scheduler,
+            jitter=timedelta(seconds=2),
+        )
+        await coordinator._async_update_data()
+        assert scheduler.async_poll.called
+        assert coordinator.update_interval == timedelta(seconds=22)
+
+    def test_async_boost(self, coordinator):
+        coordinator.update_interval = timedelta(minutes=1)
+        coordinator._listeners = [MagicMock()]
+        with patch.object(coordinator, "_schedule_refresh") as mock_schedule_refresh:
+            coordinator.async_boost()
+            assert mock_schedule_refresh.called
+        assert coordinator.update_interval == timedelta(seconds=10)
+
+    @pytest.mark.asyncio
+    async def test_async_set_polling(self, api, coordinator):
+        unsub_refresh = MagicMock()
+        coordinator._unsub_refresh = unsub_refresh
+        coordinator.async_set_polling(False)
+        assert unsub_refresh.called
+        assert coordinator.update_interval is None
+
+        coordinator.async_boost()
+        assert coordinator.update_interval is None
+        api.data = {ATTR_BRIGHTNESS: 1.0}
+        await coordinator._async_update_data()
+        assert coordinator.update_interval is None
+
+        coordinator.async_set_polling(True)
+        assert coordinator.update_interval == timedelta(seconds=10)
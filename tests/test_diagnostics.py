@@ -0,0 +1,34 @@
+"""Test for the LED-Pi diagnostics."""
+
+import pytest
+from datetime import timedelta
+from unittest.mock import MagicMock
+
+from custom_components.ledpi import API, DOMAIN, LEDPI_API, LEDPI_COORDINATOR
+from custom_components.ledpi.diagnostics import async_get_config_entry_diagnostics
+
+
+@pytest.mark.asyncio
+async def test_async_get_config_entry_diagnostics():
+    api = API(None, "host")
+    api.data = {"brightness": 1.0}
+    coordinator = MagicMock()
+    coordinator.polling = True
+    coordinator.update_interval = timedelta(seconds=30)
+    hass = MagicMock()
+    hass.data = {DOMAIN: {"entry_id": {LEDPI_API: api, LEDPI_COORDINATOR: coordinator}}}
+    entry = MagicMock()
+    entry.entry_id = "entry_id"
+    entry.options = {"push": True}
+
+    result = await async_get_config_entry_diagnostics(hass, entry)
+    assert result["options"] == {"push": True}
+    assert result["state"] == {"brightness": 1.0}
+    assert result["available"]
+    assert result["circuit_breaker"] == "closed"
+    assert result["update_interval"] == 30
+    assert result["metrics"]["latency"]["GET"]["count"] == 0
+
+    coordinator.update_interval = None
+    result = await async_get_config_entry_diagnostics(hass, entry)
+    assert result["update_interval"] is None
@@ -0,0 +1,85 @@
+"""Test for the LED-Pi effects."""
+
+import asyncio
+import itertools
+import pytest
+from homeassistant.components.light import ATTR_RGB_COLOR, ATTR_BRIGHTNESS
+
+from custom_components.ledpi.const import ATTR_PIXELS
+from custom_components.ledpi.effects import (
+    EFFECT_STEPS,
+    EffectRunner,
+    breathe,
+    candle,
+    chase,
+    rainbow,
+)
+
+
+def test_rainbow():
+    frames = list(itertools.islice(rainbow(None, None), EFFECT_STEPS + 1))
+    assert frames[0] == {ATTR_RGB_COLOR: "#ff0000"}
+    assert frames[EFFECT_STEPS // 3] == {ATTR_RGB_COLOR: "#00ff00"}
+    assert frames[EFFECT_STEPS] is frames[0]
+
+
+def test_breathe():
+    frames = list(itertools.islice(breathe(None, (255, 0, 0)), EFFECT_STEPS + 1))
+    assert frames[0][ATTR_RGB_COLOR] == "#ff0000"
+    assert frames[0][ATTR_BRIGHTNESS] == pytest.approx(0.1)
+    assert frames[EFFECT_STEPS // 2 + 1] == {ATTR_BRIGHTNESS: pytest.approx(1.0)}
+
+
+def test_chase():
+    frames = list(itertools.islice(chase(3, (255, 0, 0)), 4))
+    assert [frame[ATTR_PIXELS] for frame in frames] == [
+        "ff0000000000000000",
+        "000000ff0000000000",
+        "000000000000ff0000",
+        "ff0000000000000000",
+    ]
+
+
+def test_chase_no_leds():
+    with pytest.raises(ValueError):
+        next(chase(None, (255, 0, 0)))
+
+
+def test_candle():
+    frames = list(itertools.islice(candle(None, None), 50))
+    assert ATTR_RGB_COLOR in frames[0]
+    assert all(0.4 <= frame[ATTR_BRIGHTNESS] <= 1.0 for frame in frames)
+
+
+class TestEffectRunner:
+    @pytest.mark.asyncio
+    async def test_run(self):
+        sent = []
+
+        async def send(frame):
+            sent.append(frame)
+
+        runner = EffectRunner("test", range(3), frame_interval=0)
+        assert runner.cpu_time_per_frame == 0.0
+        await runner.run(send)
+        assert sent == [0, 1, 2]
+        assert runner.sent == 3
+        assert runner.cpu_time_per_frame >= 0.0
+
+    @pytest.mark.asyncio
+    async def test_run_backpressure(self):
+        pending = asyncio.Event()
+
+        async def send(frame):
+            await pending.wait()
+
+        runner = EffectRunner("test", itertools.count(), frame_interval=0)
+        task = asyncio.ensure_future(runner.run(send))
+        await asyncio.sleep(0.01)
+        assert runner.sent == 0
+        pending.set()
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert runner.sent > 0
@@ -0,0 +1,148 @@
+"""Test for the LED-Pi integration setup."""
+
+import pytest
+from homeassistant.const import CONF_HOST, CONF_NAME, CONF_SCAN_INTERVAL
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from custom_components.ledpi import (
+    DOMAIN,
+    LEDPI_API,
+    LEDPI_COORDINATOR,
+    LEDPI_SCHEDULER,
+    async_reload_entry,
+    async_remove_entry,
+    async_setup,
+    async_setup_entry,
+    async_unload_entry,
+)
+from custom_components.ledpi.const import ATTR_LEDS, CONF_PUSH
+from custom_components.ledpi.scheduler import PollScheduler
+
+
+@pytest.fixture
+def hass():
+    hass = MagicMock()
+    hass.data = {}
+    yield hass
+
+
+@pytest.fixture
+def entry():
+    entry = MagicMock()
+    entry.entry_id = "entry_id"
+    entry.data = {CONF_HOST: "host", CONF_NAME: "name", CONF_SCAN_INTERVAL: 5}
+    entry.options = {}
+    yield entry
+
+
+@pytest.mark.asyncio
+async def test_async_setup(hass):
+    assert await async_setup(hass, {})
+    assert isinstance(hass.data[DOMAIN][LEDPI_SCHEDULER], PollScheduler)
+    assert hass.services.async_register.called
+
+
+@patch("custom_components.ledpi.Store")
+@patch("custom_components.ledpi.LedPiCoordinator")
+@patch("custom_components.ledpi.API")
+@pytest.mark.asyncio
+async def test_async_setup_entry(mock_api, mock_coordinator, mock_store, hass, entry):
+    mock_api.return_value.update = AsyncMock()
+    mock_store.return_value.async_load = AsyncMock(return_value={ATTR_LEDS: 10})
+    assert await async_setup_entry(hass, entry)
+    scheduler = hass.data[DOMAIN][LEDPI_SCHEDULER]
+    assert mock_api.call_args.kwargs["command_delay"] == 0.05
+    assert not mock_api.call_args.kwargs["optimistic"]
+    mock_api.return_value.update.assert_called_with({ATTR_LEDS: 10}, confirmed=False)
+    assert mock_coordinator.return_value.async_refresh.called
+    assert mock_coordinator.call_args.kwargs["scheduler"] is scheduler
+    assert hass.data[DOMAIN]["entry_id"] == {
+        LEDPI_API: mock_api.return_value,
+        LEDPI_COORDINATOR: mock_coordinator.return_value,
+    }
+    assert hass.async_create_task.call_count == 3
+    assert entry.async_on_unload.called
+
+    mock_api.return_value.async_close = AsyncMock()
+    close = hass.bus.async_listen_once.call_args.args[1]
+    await close(None)
+    assert mock_api.return_value.async_close.called
+
+
+@patch("custom_components.ledpi.Store")
+@patch("custom_components.ledpi.LedPiCoordinator")
+@patch("custom_components.ledpi.API")
+@pytest.mark.asyncio
+async def test_async_setup_entry_saves_state(
+    mock_api, mock_coordinator, mock_store, hass, entry
+):
+    mock_api.return_value.data = {}
+    mock_store.return_value.async_load = AsyncMock(return_value=None)
+    assert await async_setup_entry(hass, entry)
+    assert not mock_api.return_value.update.called
+
+    save_state = mock_coordinator.return_value.async_add_listener.call_args.args[0]
+    mock_api.return_value.changed = True
+    save_state()
+    assert not mock_store.return_value.async_delay_save.called
+    mock_api.return_value.data = {ATTR_LEDS: 10}
+    mock_api.return_value.changed = False
+    save_state()
+    assert not mock_store.return_value.async_delay_save.called
+    mock_api.return_value.changed = True
+    save_state()
+    data_func = mock_store.return_value.async_delay_save.call_args.args[0]
+    assert data_func() == {ATTR_LEDS: 10}
+
+
+@pytest.mark.asyncio
+async def test_async_unload_entry(hass, entry):
+    api = MagicMock()
+    api.async_close = AsyncMock()
+    hass.data = {DOMAIN: {"entry_id": {LEDPI_API: api}}}
+    hass.config_entries.async_forward_entry_unload = AsyncMock(return_value=True)
+    assert await async_unload_entry(hass, entry)
+    assert hass.data == {DOMAIN: {}}
+    assert api.async_close.called
+
+
+@pytest.mark.asyncio
+async def test_async_unload_entry_failed(hass, entry):
+    hass.data = {DOMAIN: {"entry_id": {}}}
+    hass.config_entries.async_forward_entry_unload = AsyncMock(return_value=False)
+    assert not await async_unload_entry(hass, entry)
+    assert hass.data == {DOMAIN: {"entry_id": {}}}
+
+
+@patch("custom_components.ledpi.EventStream")
+@patch("custom_components.ledpi.Store")
+@patch("custom_components.ledpi.LedPiCoordinator")
+@patch("custom_components.ledpi.API")
+@pytest.mark.asyncio
+async def test_async_setup_entry_push(
+    mock_api, mock_coordinator, mock_store, mock_event_stream, hass, entry
+):
+    entry.options = {CONF_PUSH: True}
+    mock_store.return_value.async_load = AsyncMock(return_value=None)
+    assert await async_setup_entry(hass, entry)
+    mock_event_stream.assert_called_with(
+        mock_api.return_value, mock_coordinator.return_value
+    )
+    assert mock_event_stream.return_value.start.called
+    entry.async_on_unload.assert_any_call(mock_event_stream.return_value.stop)
+
+
+@patch("custom_components.ledpi.Store")
+@pytest.mark.asyncio
+async def test_async_remove_entry(mock_store, hass, entry):
+    mock_store.return_value.async_remove = AsyncMock()
+    await async_remove_entry(hass, entry)
+    mock_store.assert_called_with(hass, 1, "ledpi.state.entry_id")
+    assert mock_store.return_value.async_remove.called
+
+
+@pytest.mark.asyncio
+async def test_async_reload_entry(hass, entry):
+    hass.config_entries.async_reload = AsyncMock()
+    await async_reload_entry(hass, entry)
+    hass.config_entries.async_reload.assert_called_with("entry_id")
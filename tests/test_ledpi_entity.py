@@ -1,16 +1,20 @@
 """Test for the LED-Pi Entity."""
 
 import pytest
-from unittest.mock import MagicMock
+from homeassistant.components.light import ATTR_BRIGHTNESS
+from unittest.mock import MagicMock, patch
 
 from custom_components.ledpi import DOMAIN
+from custom_components.ledpi.const import ATTR_LEDS
 from custom_components.ledpi.ledpi_entity import LedPiEntity
 
 
 class TestLedPiEntity:
     @pytest.fixture
     def api(self):
-        yield MagicMock()
+        api = MagicMock()
+        api.available = True
+        yield api
 
     @pytest.fixture
     def coordinator(self):
@@ -30,3 +34,57 @@ class TestLedPiEntity:
             "manufacturer": "LED-Pi",
             "model": "WS2801 LED",
         }
+
+    def test_available(self, api, coordinator, entity):
+        coordinator.last_update_success = True
+        api.available = True
+        api.data = {ATTR_LEDS: 10}
+        assert entity.available
+        api.available = False
+        assert not entity.available
+
+    def test_available_no_state(self, api, coordinator, entity):
+        coordinator.last_update_success = True
+        api.data = {}
+        assert not entity.available
+
+    def test_handle_coordinator_update(self, api, coordinator, entity):
+        api.changed = True
+        api.data = {ATTR_LEDS: 10}
+        coordinator.last_update_success = True
+        with patch.object(entity, "async_write_ha_state") as mock_write:
+            entity._handle_coordinator_update()
+            assert mock_write.call_count == 1
+
+            api.changed = False
+            entity._handle_coordinator_update()
+            assert mock_write.call_count == 1
+
+            coordinator.last_update_success = False
+            entity._handle_coordinator_update()
+            assert mock_write.call_count == 2
+
+            api.changed = True
+            entity._handle_coordinator_update()
+            assert mock_write.call_count == 2
+
+            api.data = {ATTR_LEDS: 20}
+            entity._handle_coordinator_update()
+            assert mock_write.call_count == 3
+
+    def test_handle_coordinator_update_fields(self, api, coordinator, entity):
+        api.changed = True
+        api.data = {ATTR_LEDS: 10, ATTR_BRIGHTNESS: 1.0}
+        coordinator.last_update_success = True
+        entity.fields = (ATTR_BRIGHTNESS,)
+        with patch.object(entity, "async_write_ha_state") as mock_write:
+            entity._handle_coordinator_update()
+            assert mock_write.call_count == 1
+
+            api.data = {ATTR_LEDS: 20, ATTR_BRIGHTNESS: 1.0}
+            entity._handle_coordinator_update()
+            assert mock_write.call_count == 1
+
+            api.data = {ATTR_LEDS: 20, ATTR_BRIGHTNESS: 0.5}
+            entity._handle_coordinator_update()
+            assert mock_write.call_count == 2
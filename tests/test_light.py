@@ -4,13 +4,16 @@ import pytest
 from homeassistant.components.light import (
     SUPPORT_BRIGHTNESS,
     SUPPORT_COLOR,
+    SUPPORT_EFFECT,
+    SUPPORT_TRANSITION,
 )
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_NAME
 from unittest.mock import MagicMock, AsyncMock, patch
 
 from custom_components.ledpi import DOMAIN, LEDPI_API, LEDPI_COORDINATOR
-from custom_components.ledpi.light import LedPi, async_setup_entry
+from custom_components.ledpi.const import CONF_SEGMENTS
+from custom_components.ledpi.light import LedPi, LedPiSegment, async_setup_entry
 
 
 @patch("homeassistant.core.HomeAssistant")
@@ -43,6 +46,23 @@ async def test_async_setup_entry(mock_current_platform, mock_hass):
     assert mock_platform.async_register_entity_service.called
 
 
+@patch("homeassistant.core.HomeAssistant")
+@patch("homeassistant.helpers.entity_platform.current_platform")
+@pytest.mark.asyncio
+async def test_async_setup_entry_segments(mock_current_platform, mock_hass):
+    config_entry = ConfigEntry(
+        1, DOMAIN, "entry", {CONF_NAME: "name"}, "source", "POLL", {}
+    )
+    config_entry.options = {CONF_SEGMENTS: 2}
+    async_add_entities = MagicMock()
+
+    await async_setup_entry(mock_hass, config_entry, async_add_entities)
+    lights = async_add_entities.call_args.args[0]
+    assert len(lights) == 3
+    assert [light.index for light in lights[1:]] == [0, 1]
+    assert all(light.count == 2 for light in lights[1:])
+
+
 class TestLedPi:
     @pytest.fixture
     def api(self):
@@ -54,11 +74,15 @@ class TestLedPi:
 
     @pytest.fixture
     def async_api(self):
-        yield AsyncMock()
+        async_api = AsyncMock()
+        async_api.optimistic = False
+        yield async_api
 
     @pytest.fixture
     def async_coordinator(self):
-        yield AsyncMock()
+        async_coordinator = AsyncMock()
+        async_coordinator.async_boost = MagicMock()
+        yield async_coordinator
 
     @pytest.fixture
     def entity(self, api, coordinator):
@@ -83,25 +107,85 @@ class TestLedPi:
         assert api.is_on.called
 
     def test_brightness(self, api, entity):
-        api.brightness.return_value = 1.0
-        assert entity.brightness == 1.0
+        api.brightness.return_value = 0.5
+        assert entity.brightness == 128
         assert api.brightness.called
+        api.brightness.return_value = None
+        assert entity.brightness is None
+
+    def test_hs_color(self, api, entity):
+        api.rgb_color.return_value = (255, 0, 0)
+        assert entity.hs_color == (0, 100)
+        api.rgb_color.return_value = None
+        assert entity.hs_color is None
 
     def test_supported_features(self, entity):
-        assert entity.supported_features == SUPPORT_BRIGHTNESS & SUPPORT_COLOR
+        assert entity.supported_features == (
+            SUPPORT_BRIGHTNESS | SUPPORT_COLOR | SUPPORT_EFFECT | SUPPORT_TRANSITION
+        )
+
+    def test_effect(self, api, entity):
+        api.effect = "rainbow"
+        assert entity.effect == "rainbow"
+        assert entity.effect_list == ["rainbow", "chase", "breathe", "candle"]
+
+    @pytest.mark.asyncio
+    async def test_async_turn_on_effect(
+        self, async_api, async_coordinator, async_entity
+    ):
+        async_entity.async_write_ha_state = MagicMock()
+        await async_entity.async_turn_on(effect="candle")
+        async_api.start_effect.assert_called_with("candle")
+        assert not async_api.turn_on.called
+        assert async_coordinator.async_request_refresh.called
+        assert async_entity.async_write_ha_state.called
 
     @pytest.mark.asyncio
     async def test_async_turn_on(self, async_api, async_coordinator, async_entity):
-        await async_entity.async_turn_on(brightness=0.5, rgb_color=[255, 255, 255])
-        async_api.set_brightness.assert_called_with(0.5)
+        await async_entity.async_turn_on(brightness=51, rgb_color=[255, 255, 255])
+        async_api.set_brightness.assert_called_with(0.2)
         async_api.set_rgb.assert_called_with((255, 255, 255))
         assert async_api.turn_on.called
         assert async_coordinator.async_request_refresh.called
 
+    @pytest.mark.asyncio
+    async def test_async_turn_on_hs_color(self, async_api, async_entity):
+        await async_entity.async_turn_on(hs_color=(120, 100))
+        async_api.set_rgb.assert_called_with((0, 255, 0))
+        assert not async_api.set_brightness.called
+        assert async_api.turn_on.called
+
+    @pytest.mark.asyncio
+    async def test_async_turn_on_transition(
+        self, async_api, async_coordinator, async_entity
+    ):
+        await async_entity.async_turn_on(transition=2, rgb_color=[255, 0, 0])
+        async_api.transition.assert_called_with(
+            2.0, brightness=None, rgb_color=(255, 0, 0)
+        )
+        await async_entity.async_turn_on(transition=1, brightness=51)
+        async_api.transition.assert_called_with(1.0, brightness=0.2, rgb_color=None)
+        await async_entity.async_turn_on(transition=0.2, hs_color=(120, 100))
+        async_api.transition.assert_called_with(
+            0.2, brightness=None, rgb_color=(0, 255, 0)
+        )
+        assert not async_api.turn_on.called
+        assert async_coordinator.async_request_refresh.called
+
+    @pytest.mark.asyncio
+    async def test_async_turn_off_transition(
+        self, async_api, async_coordinator, async_entity
+    ):
+        await async_entity.async_turn_off(transition=2)
+        async_api.transition.assert_called_with(2.0, turn_off=True)
+        assert not async_api.turn_off.called
+        assert async_coordinator.async_request_refresh.called
+
     @pytest.mark.asyncio
     async def test_async_turn_off(self, async_api, async_coordinator, async_entity):
         await async_entity.async_turn_off()
         assert async_api.turn_off.called
+        assert async_coordinator.async_boost.called
         assert async_coordinator.async_request_refresh.called
 
     @pytest.mark.asyncio
@@ -109,7 +193,7 @@ class TestLedPi:
         self, async_api, async_coordinator, async_entity
     ):
         await async_entity.async_set_rgb_color([255, 255, 255])
-        async_api.set_rgb.assert_called_with((255, 255, 255), True)
+        async_api.set_rgb.assert_called_with((255, 255, 255), True, force=False)
         assert async_coordinator.async_request_refresh.called
 
     @pytest.mark.asyncio
@@ -117,5 +201,80 @@ class TestLedPi:
         self, async_api, async_coordinator, async_entity
     ):
         await async_entity.async_set_brightness(0.5)
-        async_api.set_brightness.assert_called_with(0.5, True)
+        async_api.set_brightness.assert_called_with(0.5, True, force=False)
+        assert async_coordinator.async_request_refresh.called
+        await async_entity.async_set_brightness(0.5, force=True)
+        async_api.set_brightness.assert_called_with(0.5, True, force=True)
+
+    @pytest.mark.asyncio
+    async def test_async_stream(self, async_api, async_entity):
+        async_api.stream_frame = MagicMock()
+        await async_entity.async_stream([255, 0, 0], 0.5)
+        assert async_api.start_stream.called
+        async_api.stream_frame.assert_called_with((255, 0, 0), 0.5)
+        await async_entity.async_stream()
+        async_api.stream_frame.assert_called_with(None, None)
+
+    @pytest.mark.asyncio
+    async def test_async_stop_stream(self, async_api, async_coordinator, async_entity):
+        await async_entity.async_stop_stream()
+        assert async_api.stop_stream.called
         assert async_coordinator.async_request_refresh.called
+
+    @pytest.mark.asyncio
+    async def test_async_turn_off_optimistic(self, async_api, coordinator):
+        async_api.optimistic = True
+        entity = LedPi(async_api, coordinator, "name", "uuid")
+        await entity.async_turn_off()
+        assert async_api.turn_off.called
+        coordinator.async_set_updated_data.assert_called_with(async_api.data)
+        assert not coordinator.async_request_refresh.called
+
+
+class TestLedPiSegment:
+    @pytest.fixture
+    def async_api(self):
+        yield AsyncMock()
+
+    @pytest.fixture
+    def entity(self, async_api):
+        entity = LedPiSegment(async_api, MagicMock(), "name", "uuid", 1, 3)
+        entity.async_write_ha_state = MagicMock()
+        yield entity
+
+    def test_name(self, entity):
+        assert entity.name == "name Segment 2"
+
+    def test_unique_id(self, entity):
+        assert entity.unique_id == "uuid/Segment/1"
+
+    def test_state(self, entity):
+        assert not entity.is_on
+        assert entity.brightness is None
+        assert entity.hs_color == (0, 0)
+        assert entity.supported_features == SUPPORT_COLOR
+
+    @pytest.mark.asyncio
+    async def test_async_turn_on(self, async_api, entity):
+        await entity.async_turn_on(rgb_color=[255, 0, 0])
+        async_api.set_segment.assert_called_with(1, 3, (255, 0, 0), force=False)
+        assert entity.is_on
+        assert entity.async_write_ha_state.called
+        await entity.async_turn_on(hs_color=(240, 100))
+        async_api.set_segment.assert_called_with(1, 3, (0, 0, 255), force=False)
+        await entity.async_turn_on()
+        async_api.set_segment.assert_called_with(1, 3, (0, 0, 255), force=False)
+
+    @pytest.mark.asyncio
+    async def test_async_turn_off(self, async_api, entity):
+        await entity.async_turn_off()
+        async_api.set_segment.assert_called_with(1, 3)
+        assert not entity.is_on
+        assert entity.async_write_ha_state.called
+
+    @pytest.mark.asyncio
+    async def test_async_set_rgb_color(self, async_api, entity):
+        await entity.async_set_rgb_color([0, 255, 0])
+        async_api.set_segment.assert_called_with(1, 3, (0, 255, 0), force=False)
+        await entity.async_set_rgb_color([0, 255, 0], force=True)
+        async_api.set_segment.assert_called_with(1, 3, (0, 255, 0), force=True)
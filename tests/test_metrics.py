@@ -0,0 +1,70 @@
+"""Test for the LED-Pi request metrics."""
+
+import asyncio
+from datetime import datetime, timezone
+
+from custom_components.ledpi.metrics import (
+    METHOD_GET,
+    METHOD_POST,
+    LatencyHistogram,
+    Metrics,
+)
+
+
+class TestLatencyHistogram:
+    def test_percentile_empty(self):
+        histogram = LatencyHistogram()
+        assert histogram.percentile(50) is None
+        assert histogram.as_dict()["mean"] is None
+
+    def test_percentile(self):
+        histogram = LatencyHistogram()
+        for _ in range(90):
+            histogram.record(0.004)
+        for _ in range(9):
+            histogram.record(0.2)
+        histogram.record(20)
+        assert histogram.percentile(50) == 0.005
+        assert histogram.percentile(95) == 0.25
+        assert histogram.percentile(99) == 0.25
+        assert histogram.percentile(100) == float("inf")
+
+    def test_as_dict(self):
+        histogram = LatencyHistogram()
+        histogram.record(0.01)
+        histogram.record(0.03)
+        result = histogram.as_dict()
+        assert result["count"] == 2
+        assert result["mean"] == 0.02
+        assert result["p50"] == 0.01
+        assert result["buckets"]["0.01"] == 1
+        assert result["buckets"]["0.05"] == 1
+        assert result["buckets"]["inf"] == 0
+
+
+class TestMetrics:
+    def test_record_request(self):
+        metrics = Metrics()
+        metrics.record_request(METHOD_GET, 0.01, received=10)
+        metrics.record_request(METHOD_POST, 0.02, sent=5)
+        assert metrics.latency[METHOD_GET].count == 1
+        assert metrics.latency[METHOD_POST].count == 1
+        assert metrics.bytes_received == 10
+        assert metrics.bytes_sent == 5
+
+    def test_record_error(self):
+        metrics = Metrics()
+        metrics.record_error(Exception("error"))
+        metrics.record_error(asyncio.TimeoutError())
+        assert metrics.errors == 2
+        assert metrics.timeouts == 1
+
+    def test_as_dict(self):
+        metrics = Metrics()
+        assert metrics.as_dict()["last_poll"] is None
+        metrics.last_poll = datetime(2021, 5, 1, tzinfo=timezone.utc)
+        result = metrics.as_dict()
+        assert result["last_poll"] == "2021-05-01T00:00:00+00:00"
+        assert set(result["latency"]) == {METHOD_GET, METHOD_POST}
+        assert result["errors"] == 0
+        assert result["retries"] == 0
@@ -0,0 +1,81 @@
+"""Test for the LED-Pi Event Stream."""
+
+import asyncio
+import pytest
+from homeassistant.components.light import ATTR_BRIGHTNESS
+from unittest.mock import MagicMock
+
+from custom_components.ledpi.api import API
+from custom_components.ledpi.push import EventStream
+from tests.controller import StandInController
+
+
+async def wait_for(condition, timeout=5):
+    for _ in range(int(timeout / 0.01)):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("condition not met")
+
+
+class TestEventStream:
+    @pytest.mark.asyncio
+    async def test_events(self):
+        controller = StandInController()
+        await controller.start()
+        api = API(None, controller.host)
+        coordinator = MagicMock()
+        stream = EventStream(api, coordinator, reconnect_delay=0.01)
+        stream.start()
+        try:
+            await wait_for(lambda: stream.connected)
+            coordinator.async_set_polling.assert_called_with(False)
+            assert api.brightness() == 1.0
+
+            controller.set_state({ATTR_BRIGHTNESS: 0.5})
+            await wait_for(lambda: api.data[ATTR_BRIGHTNESS] == 0.5)
+            coordinator.async_set_updated_data.assert_called_with(api.data)
+            assert controller.requests == []
+        finally:
+            stream.stop()
+            stream.stop()
+            await api.async_close()
+            await controller.stop()
+
+    @pytest.mark.asyncio
+    async def test_events_own_session(self):
+        controller = StandInController()
+        await controller.start()
+        api = API(None, controller.host)
+        stream = EventStream(api, MagicMock(), reconnect_delay=0.01)
+        stream.start()
+        try:
+            await wait_for(lambda: stream.connected)
+            assert api._session is None
+            await api.update()
+            assert api._get_session().connector.limit_per_host == 2
+            assert len(controller.requests) == 1
+        finally:
+            stream.stop()
+            await api.async_close()
+            await controller.stop()
+
+    @pytest.mark.asyncio
+    async def test_events_reconnect(self):
+        controller = StandInController()
+        await controller.start()
+        api = API(None, controller.host)
+        coordinator = MagicMock()
+        stream = EventStream(
+            api, coordinator, reconnect_delay=0.01, max_reconnect_delay=0.02
+        )
+        stream.start()
+        try:
+            await wait_for(lambda: stream.connected)
+            await controller.stop()
+            await wait_for(lambda: not stream.connected)
+            coordinator.async_set_polling.assert_called_with(True)
+            await asyncio.sleep(0.05)
+        finally:
+            stream.stop()
+            await api.async_close()
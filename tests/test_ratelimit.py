@@ -0,0 +1,85 @@
+"""Test for the LED-Pi rate limiter."""
+
+import asyncio
+import pytest
+
+from custom_components.ledpi.ratelimit import (
+    PRIORITY_FRAME,
+    PRIORITY_POLL,
+    PRIORITY_SAFETY,
+    PRIORITY_USER,
+    RateLimiter,
+)
+
+
+class TestRateLimiter:
+    @pytest.mark.asyncio
+    async def test_burst(self):
+        limiter = RateLimiter(1, burst=2)
+        assert await limiter.acquire(PRIORITY_USER)
+        assert await limiter.acquire(PRIORITY_USER)
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(limiter.acquire(PRIORITY_USER), 0.05)
+        assert not limiter._waiters
+
+    @pytest.mark.asyncio
+    async def test_rate(self):
+        limiter = RateLimiter(100, burst=1)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        for _ in range(5):
+            assert await limiter.acquire(PRIORITY_USER)
+        assert loop.time() - start >= 0.035
+
+    @pytest.mark.asyncio
+    async def test_priorities(self):
+        limiter = RateLimiter(100, burst=1)
+        assert await limiter.acquire(PRIORITY_USER)
+        order = []
+
+        async def acquire(priority):
+            await limiter.acquire(priority)
+            order.append(priority)
+
+        await asyncio.gather(
+            acquire(PRIORITY_POLL),
+            acquire(PRIORITY_FRAME),
+            acquire(PRIORITY_USER),
+            acquire(PRIORITY_SAFETY),
+        )
+        assert order == [PRIORITY_SAFETY, PRIORITY_USER, PRIORITY_FRAME, PRIORITY_POLL]
+
+    @pytest.mark.asyncio
+    async def test_full_queue(self):
+        limiter = RateLimiter(100, burst=1, max_queue=2)
+        assert await limiter.acquire(PRIORITY_USER)
+        poll = asyncio.ensure_future(limiter.acquire(PRIORITY_POLL))
+        frame = asyncio.ensure_future(limiter.acquire(PRIORITY_FRAME))
+        await asyncio.sleep(0)
+
+        # a more important request replaces the least important one
+        user = asyncio.ensure_future(limiter.acquire(PRIORITY_USER))
+        assert not await poll
+
+        # less important requests are dropped, commands are always queued
+        assert not await limiter.acquire(PRIORITY_POLL)
+        safety = asyncio.ensure_future(limiter.acquire(PRIORITY_SAFETY))
+        assert await safety
+        assert await user
+        assert not await frame
+        assert limiter.dropped == 3
+
+    @pytest.mark.asyncio
+    async def test_cancel_after_release(self):
+        limiter = RateLimiter(100, burst=1)
+        assert await limiter.acquire(PRIORITY_USER)
+        task = asyncio.ensure_future(limiter.acquire(PRIORITY_USER))
+        await asyncio.sleep(0)
+        waiter = limiter._waiters[0][2]
+        limiter._tokens = 1
+        limiter._release()
+        assert waiter.result()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert limiter._tokens == 1
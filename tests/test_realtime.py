@@ -0,0 +1,93 @@
+"""Test for the LED-Pi realtime stream."""
+
+import asyncio
+import pytest
+from unittest.mock import MagicMock
+
+from custom_components.ledpi.realtime import (
+    FLAG_PIXELS,
+    FRAME_HEADER,
+    FRAME_MAGIC,
+    FRAME_VERSION,
+    MAX_WRITE_BUFFER_SIZE,
+    RealtimeStream,
+    encode_frame,
+)
+
+
+class Receiver(asyncio.DatagramProtocol):
+    def __init__(self):
+        self.frames = asyncio.Queue()
+
+    def datagram_received(self, data, addr):
+        self.frames.put_nowait(data)
+
+
+def test_encode_frame():
+    frame = encode_frame(7, 0.5, bytes((255, 0, 0)))
+    assert frame[: FRAME_HEADER.size] == FRAME_HEADER.pack(
+        FRAME_MAGIC, FRAME_VERSION, 0, 7, 128
+    )
+    assert frame[FRAME_HEADER.size :] == bytes((255, 0, 0))
+
+
+def test_encode_frame_pixels():
+    frame = encode_frame(1, 2.0, bytes(6), pixels=True)
+    _, _, flags, _, brightness = FRAME_HEADER.unpack_from(frame)
+    assert flags == FLAG_PIXELS
+    assert brightness == 255
+    assert len(frame) == FRAME_HEADER.size + 6
+
+
+class TestRealtimeStream:
+    def test_send_not_connected(self):
+        stream = RealtimeStream()
+        assert not stream.send(1.0, bytes(3))
+        stream.close()
+
+    def test_send_drops_frames(self):
+        stream = RealtimeStream()
+        transport = MagicMock()
+        transport.get_write_buffer_size.return_value = MAX_WRITE_BUFFER_SIZE + 1
+        stream.connection_made(transport)
+        assert not stream.send(1.0, bytes(3))
+        assert stream.dropped == 1
+        assert not transport.sendto.called
+
+    def test_sequence_wraps(self):
+        stream = RealtimeStream()
+        transport = MagicMock()
+        transport.get_write_buffer_size.return_value = 0
+        stream.connection_made(transport)
+        stream.sequence = 0xFFFFFFFF
+        assert stream.send(1.0, bytes(3))
+        assert stream.sequence == 0
+
+    def test_error_received(self):
+        stream = RealtimeStream()
+        stream.error_received(ConnectionRefusedError())
+
+    @pytest.mark.asyncio
+    async def test_send(self):
+        loop = asyncio.get_running_loop()
+        receiver_transport, receiver = await loop.create_datagram_endpoint(
+            Receiver, local_addr=("127.0.0.1", 0)
+        )
+        _, stream = await loop.create_datagram_endpoint(
+            RealtimeStream,
+            remote_addr=receiver_transport.get_extra_info("sockname"),
+        )
+        try:
+            assert stream.send(1.0, bytes((1, 2, 3)))
+            assert stream.send(0.0, bytes((4, 5, 6)))
+            first = await asyncio.wait_for(receiver.frames.get(), 1)
+            second = await asyncio.wait_for(receiver.frames.get(), 1)
+            assert FRAME_HEADER.unpack_from(first)[3] == 1
+            assert FRAME_HEADER.unpack_from(second)[3] == 2
+            assert second[FRAME_HEADER.size :] == bytes((4, 5, 6))
+            assert stream.sent == 2
+        finally:
+            stream.close()
+            receiver_transport.close()
+        await asyncio.sleep(0)
+        assert stream.transport is None
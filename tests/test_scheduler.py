@@ -0,0 +1,45 @@
+"""Test for the LED-Pi Poll Scheduler."""
+
+import asyncio
+import pytest
+from datetime import timedelta
+from unittest.mock import AsyncMock
+
+from custom_components.ledpi.scheduler import PollScheduler
+
+
+class TestPollScheduler:
+    @pytest.fixture
+    def scheduler(self):
+        yield PollScheduler(max_concurrent=2, max_jitter=10)
+
+    def test_jitter(self, scheduler):
+        jitter = scheduler.jitter("entry_id")
+        assert jitter == scheduler.jitter("entry_id")
+        assert timedelta() <= jitter <= timedelta(seconds=10)
+        assert jitter != scheduler.jitter("other_entry_id")
+
+    @pytest.mark.asyncio
+    async def test_async_poll(self, scheduler):
+        update_method = AsyncMock(return_value="data")
+        assert await scheduler.async_poll("name", update_method) == "data"
+        assert update_method.called
+        assert "name" in scheduler.durations
+
+    @pytest.mark.asyncio
+    async def test_async_poll_limits_concurrency(self, scheduler):
+        running = 0
+        max_running = 0
+
+        async def update_method():
+            nonlocal running, max_running
+            running += 1
+            max_running = max(max_running, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+        await asyncio.gather(
+            *[scheduler.async_poll(f"name{i}", update_method) for i in range(5)]
+        )
+        assert max_running == 2
+        assert len(scheduler.durations) == 5
@@ -1,8 +1,15 @@
 """Test for the LED-Pi Sensor Entities."""
 
 import pytest
+from homeassistant.components.light import ATTR_BRIGHTNESS
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import CONF_NAME, PERCENTAGE
+from datetime import datetime, timezone
+from homeassistant.const import (
+    CONF_NAME,
+    DEVICE_CLASS_TIMESTAMP,
+    PERCENTAGE,
+    TIME_MILLISECONDS,
+)
 from unittest.mock import MagicMock, patch
 
 from custom_components.ledpi import DOMAIN, LEDPI_API, LEDPI_COORDINATOR
@@ -12,7 +19,11 @@ from custom_components.ledpi.sensor import (
     LedPiRGBNameSensor,
     LedPiLEDsSensor,
     LedPiBrightnessSensor,
+    LedPiLatencySensor,
+    LedPiErrorsSensor,
+    LedPiLastPollSensor,
 )
+from custom_components.ledpi.metrics import METHOD_GET, Metrics
 
 
 @patch("homeassistant.core.HomeAssistant")
@@ -145,6 +156,9 @@ class TestLedPiBrightnessSensor:
     def test_unique_id(self, entity):
         assert entity.unique_id == "uuid/Brightness"
 
+    def test_fields(self, entity):
+        assert entity.fields == (ATTR_BRIGHTNESS,)
+
     def test_unit_of_measurement(self, entity):
         assert entity.unit_of_measurement == PERCENTAGE
 
@@ -152,3 +166,102 @@ class TestLedPiBrightnessSensor:
         api.brightness.return_value = 1.0
         assert entity.state == 1.0
         assert api.brightness.called
+
+
+class TestLedPiLatencySensor:
+    @pytest.fixture
+    def api(self):
+        api = MagicMock()
+        api.metrics = Metrics()
+        yield api
+
+    @pytest.fixture
+    def entity(self, api):
+        entity = LedPiLatencySensor(api, MagicMock(), "name", "uuid", METHOD_GET)
+        entity.async_write_ha_state = MagicMock()
+        yield entity
+
+    def test_name(self, entity):
+        assert entity.name == "name GET Latency"
+
+    def test_unique_id(self, entity):
+        assert entity.unique_id == "uuid/GET Latency"
+
+    def test_diagnostic(self, api, entity):
+        assert not entity.entity_registry_enabled_default
+        assert entity.icon == "mdi:chart-bell-curve"
+        api.available = False
+        assert entity.available
+
+    def test_unit_of_measurement(self, entity):
+        assert entity.unit_of_measurement == TIME_MILLISECONDS
+
+    def test_state(self, api, entity):
+        assert entity.state is None
+        api.metrics.record_request(METHOD_GET, 0.02)
+        assert entity.state == 25
+        assert entity.extra_state_attributes == {"p50": 25, "p99": 25, "requests": 1}
+
+    def test_handle_coordinator_update(self, api, entity):
+        entity._handle_coordinator_update()
+        entity._handle_coordinator_update()
+        assert entity.async_write_ha_state.call_count == 1
+        api.metrics.record_request(METHOD_GET, 0.02)
+        entity._handle_coordinator_update()
+        assert entity.async_write_ha_state.call_count == 2
+
+
+class TestLedPiErrorsSensor:
+    @pytest.fixture
+    def api(self):
+        api = MagicMock()
+        api.metrics = Metrics()
+        yield api
+
+    @pytest.fixture
+    def entity(self, api):
+        yield LedPiErrorsSensor(api, MagicMock(), "name", "uuid")
+
+    def test_icon(self, entity):
+        assert entity.icon == "mdi:alert-circle-outline"
+
+    def test_name(self, entity):
+        assert entity.name == "name Request Errors"
+
+    def test_unique_id(self, entity):
+        assert entity.unique_id == "uuid/Request Errors"
+
+    def test_state(self, api, entity):
+        api.metrics.record_error(Exception("error"))
+        assert entity.state == 1
+        assert entity.extra_state_attributes == {"timeouts": 0, "retries": 0}
+
+
+class TestLedPiLastPollSensor:
+    @pytest.fixture
+    def api(self):
+        api = MagicMock()
+        api.metrics = Metrics()
+        yield api
+
+    @pytest.fixture
+    def entity(self, api):
+        yield LedPiLastPollSensor(api, MagicMock(), "name", "uuid")
+
+    def test_icon(self, entity):
+        assert entity.icon == "mdi:clock-check-outline"
+
+    def test_name(self, entity):
+        assert entity.name == "name Last Poll"
+
+    def test_unique_id(self, entity):
+        assert entity.unique_id == "uuid/Last Poll"
+
+    def test_device_class(self, entity):
+        assert entity.device_class == DEVICE_CLASS_TIMESTAMP
+
+    def test_state(self, api, entity):
+        assert entity.state is None
+        api.metrics.last_poll = datetime(2021, 5, 1, tzinfo=timezone.utc)
+        assert entity.state == "2021-05-01T00:00:00+00:00"
+        assert entity.extra_state_attributes is None
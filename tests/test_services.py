@@ -0,0 +1,220 @@
+"""Test for the LED-Pi services."""
+
+import pytest
+import time
+from homeassistant.components.light import ATTR_BRIGHTNESS, ATTR_RGB_COLOR
+from homeassistant.const import ATTR_ENTITY_ID, CONF_NAME, CONF_STATE
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from custom_components.ledpi import API
+from custom_components.ledpi.const import (
+    ATTR_DURATION,
+    ATTR_FORCE,
+    ATTR_PERSIST,
+    ATTR_STATE,
+    DOMAIN,
+    EVENT_BROADCAST,
+    EVENT_TRACE,
+    LEDPI_API,
+    LEDPI_COORDINATOR,
+    LEDPI_SCHEDULER,
+    SERVICE_BROADCAST,
+    SERVICE_DUMP_TRACE,
+    SERVICE_PROFILE,
+    SERVICE_RESTORE,
+    SERVICE_SNAPSHOT,
+)
+from custom_components.ledpi.services import (
+    BROADCAST_SCHEMA,
+    RESTORE_SCHEMA,
+    SNAPSHOT_SCHEMA,
+    async_dispatch,
+    async_get_entries,
+    async_setup_services,
+)
+from custom_components.ledpi.trace import TRIGGER
+from tests.controller import StandInController
+
+
+def entry_data(accepted=True):
+    api = MagicMock()
+    api.host = "host"
+    api.data = {ATTR_STATE: "on"}
+    api.triggers = []
+
+    async def async_send_state(state, force=False):
+        api.triggers.append(TRIGGER.get())
+        return accepted
+
+    api.async_send_state = AsyncMock(side_effect=async_send_state)
+    return {LEDPI_API: api, LEDPI_COORDINATOR: MagicMock()}
+
+
+@pytest.fixture
+def hass():
+    hass = MagicMock()
+    hass.data = {DOMAIN: {LEDPI_SCHEDULER: MagicMock()}}
+    yield hass
+
+
+@pytest.fixture
+def store():
+    with patch("custom_components.ledpi.services.Store") as mock_store:
+        mock_store.return_value.async_load = AsyncMock(return_value=None)
+        mock_store.return_value.async_save = AsyncMock()
+        yield mock_store.return_value
+
+
+@pytest.fixture
+def services(hass, store):
+    async_setup_services(hass)
+    yield {
+        call.args[1]: call.args[2]
+        for call in hass.services.async_register.call_args_list
+    }
+
+
+@pytest.mark.asyncio
+async def test_broadcast(hass, services):
+    hass.data[DOMAIN]["first"] = entry_data()
+    hass.data[DOMAIN]["second"] = entry_data(accepted=False)
+    data = BROADCAST_SCHEMA(
+        {CONF_STATE: "on", ATTR_BRIGHTNESS: 0.5, ATTR_RGB_COLOR: [255, 0, 0]}
+    )
+    await services[SERVICE_BROADCAST](MagicMock(data=data))
+    for entry_id in ("first", "second"):
+        hass.data[DOMAIN][entry_id][LEDPI_API].async_send_state.assert_called_with(
+            {ATTR_STATE: "on", ATTR_BRIGHTNESS: 0.5, ATTR_RGB_COLOR: "#ff0000"},
+            force=False,
+        )
+    assert hass.data[DOMAIN]["first"][LEDPI_COORDINATOR].async_set_updated_data.called
+    assert hass.data[DOMAIN]["first"][LEDPI_API].triggers == ["ledpi.broadcast"]
+    assert TRIGGER.get() is None
+    assert not hass.data[DOMAIN]["second"][
+        LEDPI_COORDINATOR
+    ].async_set_updated_data.called
+    hass.bus.async_fire.assert_called_with(
+        EVENT_BROADCAST, {"results": {"first": True, "second": False}}
+    )
+
+
+@pytest.mark.asyncio
+async def test_broadcast_concurrently():
+    controllers = [StandInController(latency=0.1) for _ in range(5)]
+    entries = {}
+    try:
+        for index, controller in enumerate(controllers):
+            await controller.start()
+            entries[index] = {
+                LEDPI_API: API(None, controller.host),
+                LEDPI_COORDINATOR: MagicMock(),
+            }
+        start = time.monotonic()
+        results = await async_dispatch(
+            entries,
+            lambda entry_id, api: api.async_send_state({ATTR_BRIGHTNESS: 0.5}),
+        )
+        assert time.monotonic() - start < 0.3
+        assert all(results.values())
+        for index, controller in enumerate(controllers):
+            assert controller.requests == [("POST", {ATTR_BRIGHTNESS: 0.5})]
+            assert entries[index][LEDPI_API].data[ATTR_BRIGHTNESS] == 0.5
+    finally:
+        for data in entries.values():
+            await data[LEDPI_API].async_close()
+        for controller in controllers:
+            await controller.stop()
+
+
+@pytest.mark.asyncio
+async def test_snapshot_restore(hass, services, store):
+    hass.data[DOMAIN]["first"] = entry_data()
+    hass.data[DOMAIN]["first"][LEDPI_API].data = {
+        ATTR_STATE: "on",
+        ATTR_BRIGHTNESS: 0.5,
+        ATTR_RGB_COLOR: "#ff0000",
+        "other": 1,
+    }
+    hass.data[DOMAIN]["unknown"] = entry_data()
+    hass.data[DOMAIN]["unknown"][LEDPI_API].data = {}
+    await services[SERVICE_SNAPSHOT](MagicMock(data=SNAPSHOT_SCHEMA({})))
+    assert not store.async_save.called
+
+    hass.data[DOMAIN]["first"][LEDPI_API].data = {ATTR_STATE: "off"}
+    await services[SERVICE_RESTORE](MagicMock(data=RESTORE_SCHEMA({})))
+    hass.data[DOMAIN]["first"][LEDPI_API].async_send_state.assert_called_once_with(
+        {ATTR_STATE: "on", ATTR_BRIGHTNESS: 0.5, ATTR_RGB_COLOR: "#ff0000"},
+        force=False,
+    )
+    assert not hass.data[DOMAIN]["unknown"][LEDPI_API].async_send_state.called
+    assert hass.data[DOMAIN]["first"][LEDPI_API].triggers == ["ledpi.restore"]
+    assert hass.data[DOMAIN]["first"][LEDPI_COORDINATOR].async_set_updated_data.called
+
+
+@pytest.mark.asyncio
+async def test_snapshot_persist(hass, services, store):
+    hass.data[DOMAIN]["first"] = entry_data()
+    await services[SERVICE_SNAPSHOT](
+        MagicMock(data=SNAPSHOT_SCHEMA({CONF_NAME: "scene", ATTR_PERSIST: True}))
+    )
+    store.async_save.assert_called_with({"scene": {"first": {ATTR_STATE: "on"}}})
+
+
+@pytest.mark.asyncio
+async def test_restore_persisted(hass, services, store):
+    hass.data[DOMAIN]["first"] = entry_data()
+    store.async_load.return_value = {"scene": {"first": {ATTR_STATE: "off"}}}
+    await services[SERVICE_RESTORE](
+        MagicMock(data=RESTORE_SCHEMA({CONF_NAME: "scene", ATTR_FORCE: True}))
+    )
+    hass.data[DOMAIN]["first"][LEDPI_API].async_send_state.assert_called_once_with(
+        {ATTR_STATE: "off"}, force=True
+    )
+
+    await services[SERVICE_RESTORE](MagicMock(data=RESTORE_SCHEMA({CONF_NAME: "none"})))
+    assert hass.data[DOMAIN]["first"][LEDPI_API].async_send_state.call_count == 1
+
+
+def test_async_get_entries(hass):
+    hass.data[DOMAIN]["first"] = entry_data()
+    hass.data[DOMAIN]["second"] = entry_data()
+    assert set(async_get_entries(hass)) == {"first", "second"}
+
+    registry = MagicMock()
+    registry.async_get.side_effect = lambda entity_id: {
+        "light.first": MagicMock(config_entry_id="first")
+    }.get(entity_id)
+    with patch(
+        "custom_components.ledpi.services.entity_registry.async_get",
+        return_value=registry,
+    ):
+        entries = async_get_entries(hass, ["light.first", "light.unknown"])
+    assert set(entries) == {"first"}
+
+
+@pytest.mark.asyncio
+async def test_dump_trace(hass, services):
+    api = MagicMock()
+    api.host = "host"
+    api.trace.dump.return_value = [{"method": "GET"}]
+    hass.data[DOMAIN]["entry_id"] = {LEDPI_API: api}
+    await services[SERVICE_DUMP_TRACE](MagicMock())
+    hass.bus.async_fire.assert_called_once_with(
+        EVENT_TRACE,
+        {"entry_id": "entry_id", "host": "host", "trace": [{"method": "GET"}]},
+    )
+
+
+@pytest.mark.asyncio
+async def test_profile(hass, services):
+    with patch("custom_components.ledpi.services.Profiler.async_profile") as profile:
+        await services[SERVICE_PROFILE](MagicMock(data={ATTR_DURATION: 5}))
+        profile.assert_called_with(hass, 5)
+
+
+def test_broadcast_schema():
+    data = BROADCAST_SCHEMA(
+        {ATTR_ENTITY_ID: "light.ledpi", ATTR_RGB_COLOR: ["255", 0, 0]}
+    )
+    assert data[ATTR_ENTITY_ID] == ["light.ledpi"]
+    assert data[ATTR_RGB_COLOR] == (255, 0, 0)
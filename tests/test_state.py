@@ -0,0 +1,47 @@
+"""Test for the LED-Pi State Snapshot."""
+
+import pytest
+from homeassistant.components.light import ATTR_BRIGHTNESS, ATTR_RGB_COLOR
+
+from custom_components.ledpi.const import ATTR_LEDS, ATTR_STATE
+from custom_components.ledpi.state import LedPiState, hex_to_name, hex_to_rgb
+
+
+class TestLedPiState:
+    def test_state(self):
+        state = LedPiState(
+            {ATTR_STATE: "on", ATTR_BRIGHTNESS: 1.0, ATTR_RGB_COLOR: "#ffffff"}
+        )
+        assert state.is_on
+        assert state.brightness == 1.0
+        assert state.rgb_hex_color == "#ffffff"
+        assert state.rgb_color == (255, 255, 255)
+        assert state.rgb_name == "white"
+
+    def test_state_empty(self):
+        state = LedPiState({})
+        assert state.is_on is None
+        assert state.brightness is None
+        assert state.rgb_hex_color is None
+        assert state.rgb_color is None
+        assert state.rgb_name is None
+
+    def test_state_is_immutable(self):
+        state = LedPiState({ATTR_LEDS: 10})
+        with pytest.raises(AttributeError):
+            state.leds = 20
+
+
+def test_hex_to_rgb_cached():
+    hex_to_rgb.cache_clear()
+    assert hex_to_rgb("#ffffff") == (255, 255, 255)
+    assert hex_to_rgb("#ffffff") == (255, 255, 255)
+    assert hex_to_rgb.cache_info().hits == 1
+
+
+def test_hex_to_rgb_invalid():
+    assert hex_to_rgb("#xxxxxx") is None
+
+
+def test_hex_to_name_invalid():
+    assert hex_to_name("#xxxxxx") is None
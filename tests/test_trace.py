@@ -0,0 +1,73 @@
+"""Test for the LED-Pi tracing and profiling."""
+
+import asyncio
+import pytest
+from unittest.mock import MagicMock
+
+from custom_components.ledpi.trace import TRIGGER, Profiler, Trace, triggered_by
+
+
+class Entity:
+    entity_id = "light.ledpi"
+
+    @triggered_by
+    async def async_turn_on(self):
+        return TRIGGER.get()
+
+
+@pytest.mark.asyncio
+async def test_triggered_by():
+    assert await Entity().async_turn_on() == "light.ledpi.async_turn_on"
+    assert TRIGGER.get() is None
+
+
+class TestTrace:
+    def test_disabled(self):
+        trace = Trace()
+        assert not trace.enabled
+        trace.record("GET", 10)
+        assert trace.dump() == []
+
+    def test_record(self):
+        trace = Trace(2)
+        assert trace.enabled
+        token = TRIGGER.set("light.ledpi.async_turn_on")
+        try:
+            trace.record("POST", 10, queue_wait=0.05, network=0.01, parse=0.001)
+        finally:
+            TRIGGER.reset(token)
+        entry = trace.dump()[0]
+        assert entry["method"] == "POST"
+        assert entry["bytes"] == 10
+        assert entry["queue_wait_ms"] == 50
+        assert entry["network_ms"] == 10
+        assert entry["parse_ms"] == 1
+        assert entry["trigger"] == "light.ledpi.async_turn_on"
+        assert entry["error"] is None
+
+    def test_ring_buffer(self):
+        trace = Trace(2)
+        for size in range(3):
+            trace.record("GET", size)
+        assert [entry["bytes"] for entry in trace.dump()] == [1, 2]
+
+
+class TestProfiler:
+    @pytest.mark.asyncio
+    async def test_async_profile(self, tmp_path):
+        hass = MagicMock()
+        hass.config.path = lambda name: str(tmp_path / name)
+
+        async def async_add_executor_job(target, *args):
+            return target(*args)
+
+        hass.async_add_executor_job = async_add_executor_job
+        profiler = Profiler()
+        task = asyncio.ensure_future(profiler.async_profile(hass, 0.01))
+        await asyncio.sleep(0)
+        assert profiler.running
+        assert await profiler.async_profile(hass, 0.01) is None
+        path = await task
+        assert not profiler.running
+        assert path.startswith(str(tmp_path))
+        assert (tmp_path / path.split("/")[-1]).exists()
@@ -0,0 +1,48 @@
+"""Test for the LED-Pi transitions."""
+
+import asyncio
+import pytest
+from homeassistant.components.light import ATTR_RGB_COLOR, ATTR_BRIGHTNESS
+
+from custom_components.ledpi.transition import Transition, interpolate
+
+
+def test_interpolate():
+    frames = interpolate(0.0, 1.0, (0, 0, 0), (255, 255, 255), 4)
+    assert len(frames) == 4
+    assert frames[0] == {ATTR_BRIGHTNESS: 0.25, ATTR_RGB_COLOR: "#404040"}
+    assert frames[-1] == {ATTR_BRIGHTNESS: 1.0, ATTR_RGB_COLOR: "#ffffff"}
+
+
+def test_interpolate_same_color():
+    frames = interpolate(1.0, 0.0, (255, 0, 0), (255, 0, 0), 2)
+    assert frames == [{ATTR_BRIGHTNESS: 0.5}, {ATTR_BRIGHTNESS: 0.0}]
+
+
+class TestTransition:
+    @pytest.mark.asyncio
+    async def test_run(self):
+        sent = []
+
+        async def send(frame):
+            sent.append(frame)
+
+        transition = Transition(list(range(5)), 0.05, frame_interval=0.0)
+        await transition.run(send)
+        assert sent == sorted(set(sent))
+        assert sent[-1] == 4
+        assert transition.sent == len(sent)
+
+    @pytest.mark.asyncio
+    async def test_run_slow_controller(self):
+        sent = []
+
+        async def send(frame):
+            sent.append(frame)
+            await asyncio.sleep(0.03)
+
+        transition = Transition(list(range(100)), 0.1, frame_interval=0.0)
+        await transition.run(send)
+        assert sent[-1] == 99
+        assert len(sent) < 10
+        assert transition.latency >= 0.03